@@ -0,0 +1,81 @@
+"""
+Формат кэша: обычный JSON-словарь карточек (как раньше), словарная таблица
+companium.cardtable и бинарный блочный кэш companium.blockcache — размер файла, время
+загрузки и сохранения, память под кэш; для бинарного — чтение одной карточки.
+
+    python bench/bench_cache_format.py --cards 50000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from companium import engine, jsonio  # noqa: E402
+from companium.blockcache import BlockCache, record_codec  # noqa: E402
+from companium.cardtable import CardTable  # noqa: E402
+from companium.compression import block_codec  # noqa: E402
+from bench_json import build_cache  # noqa: E402
+
+
+def measure(fn):
+    """(время без трассировки, память результата по tracemalloc)."""
+    gc.collect()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current
+
+
+def main(args):
+    cards = build_cache(args.cards)
+    workdir = tempfile.mkdtemp()
+    variants = [
+        ('словарь, отступы', '.json', lambda path: jsonio.dump(cards, path, indent=True), jsonio.load),
+        ('словарь', '.json', lambda path: jsonio.dump(cards, path), jsonio.load),
+        ('таблица', '.json', lambda path: engine.save_cache(CardTable(cards), path), engine.load_cache),
+        ('бинарный', '.bin', lambda path: engine.save_cache(CardTable(cards), path), engine.load_cache),
+    ]
+    print(f"Карточек: {len(cards)} ({jsonio.BACKEND}, блоки: {block_codec()}, записи: {record_codec()})")
+    for name, suffix, save, load in variants:
+        path = os.path.join(workdir, 'cache' + suffix)
+        started = time.perf_counter()
+        save(path)
+        saved = time.perf_counter() - started
+        loaded, elapsed, memory = measure(lambda: load(path))
+        same = all(loaded[inn] == card for inn, card in cards.items())
+        extra = ''
+        if isinstance(loaded, CardTable):
+            extra = ", наборов ключей {}, строк {}, видов деятельности {}".format(*loaded.stats())
+        print(f"{name:17} файл {os.path.getsize(path) / 1024 / 1024:6.1f} МБ, сохранение {saved:5.2f} сек, "
+              f"загрузка {elapsed:5.2f} сек, в памяти {memory / 1024 / 1024:6.1f} МБ, "
+              f"совпадает: {same}{extra}")
+        del loaded
+
+    inns = random.Random(0).sample(list(cards), args.lookups)
+    started = time.perf_counter()
+    with BlockCache(path) as blocks:
+        opened = time.perf_counter() - started
+        for inn in inns:
+            assert blocks[inn] == cards[inn]
+    elapsed = time.perf_counter() - started - opened
+    print(f"Бинарный, выборочное чтение: открытие (индекс) {opened * 1000:.0f} мс, "
+          f"{elapsed / len(inns) * 1000:.2f} мс на карточку ({len(inns)} случайных ИНН)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=50000)
+    parser.add_argument('--lookups', type=int, default=1000, help='Случайных чтений из бинарного кэша')
+    main(parser.parse_args())
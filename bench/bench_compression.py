@@ -0,0 +1,60 @@
+"""
+Бенчмарк сжатия при передаче: прогон N ИНН через движок против локального мока
+для каждой доступной кодировки. Печатает байты на проводе/после распаковки и время
+в пересчёте на 1000 ИНН.
+
+    python bench/bench_compression.py --inns 1000 --bandwidth 2048
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from companium import engine  # noqa: E402
+from companium.compression import supported_encodings  # noqa: E402
+from mock_server import start_server  # noqa: E402
+
+
+async def run_once(base_url: str, inns, encoding: str) -> dict:
+    engine.BASE_URL = f"{base_url}/search/tips?query="
+    engine.DETAILS_URL = base_url
+    engine.DELAY_RANGE = (0, 0)
+    engine.RUN_STATS.clear()
+    headers = dict(engine.HEADERS, **{'accept-encoding': encoding})
+    started = time.perf_counter()
+    cache = {}
+    await engine.process_inn_batch(inns, cache, {}, headers)
+    elapsed = time.perf_counter() - started
+    return {
+        'encoding': encoding,
+        'cards': len(cache),
+        'wire': engine.RUN_STATS['bytes_wire'],
+        'decoded': engine.RUN_STATS['bytes_decoded'],
+        'elapsed': elapsed,
+    }
+
+
+async def main(args):
+    runner, base_url = await start_server(bandwidth_kb=args.bandwidth, latency=args.latency)
+    inns = [str(7700000000 + i) for i in range(args.inns)]
+    try:
+        rows = [await run_once(base_url, inns, enc) for enc in ['identity'] + supported_encodings()]
+    finally:
+        await runner.cleanup()
+
+    scale = 1000 / len(inns)
+    print(f"{'кодировка':<10} {'карточек':>8} {'МБ/1000 провод':>15} {'МБ/1000 распак.':>16} {'сек/1000':>9}")
+    for r in rows:
+        print(f"{r['encoding']:<10} {r['cards']:>8} {r['wire'] * scale / 2 ** 20:>15.2f} "
+              f"{r['decoded'] * scale / 2 ** 20:>16.2f} {r['elapsed'] * scale:>9.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inns', type=int, default=1000)
+    parser.add_argument('--bandwidth', type=float, default=0, help='КБ/с на ответ, 0 — без ограничения')
+    parser.add_argument('--latency', type=float, default=0)
+    asyncio.run(main(parser.parse_args()))
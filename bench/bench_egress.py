@@ -0,0 +1,63 @@
+"""
+Пул каналов против мока: N ИНН через несколько локальных прокси с разным поведением
+(быстрый, медленный, отвечающий 429) и, опционально, через адреса-источники 127.0.0.x.
+Печатает время и пропускную способность по каждому каналу.
+
+    python bench/bench_egress.py --inns 300 --rate 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from companium import engine  # noqa: E402
+from mock_proxy import start_proxy  # noqa: E402
+from mock_server import start_server  # noqa: E402
+
+PROXIES = [
+    {'latency': 0, 'throttle': 0},  # здоровый
+    {'latency': 0.5, 'throttle': 0},  # медленный
+    {'latency': 0, 'throttle': 0.3},  # часто получает 429
+]
+
+
+async def main(args):
+    server, base_url = await start_server()
+    runners, egress = [server], []
+    for options in PROXIES:
+        runner, url = await start_proxy(**options)
+        runners.append(runner)
+        egress.append(url)
+    egress += [f"127.0.0.{i}" for i in range(2, 2 + args.source_addrs)]
+
+    engine.BASE_URL = f"{base_url}/search/tips?query="
+    engine.DETAILS_URL = base_url
+    engine.DELAY_RANGE = (0, 0)
+    engine.CONCURRENT_REQUESTS = args.workers
+    inns = [str(7700000000 + i) for i in range(args.inns)]
+    pool = await engine.open_session(egress, args.rate)
+    started = time.perf_counter()
+    try:
+        results, failures = await engine.run_inn_queue(pool, inns, {})
+    finally:
+        await pool.close()
+        for runner in runners:
+            await runner.cleanup()
+    elapsed = time.perf_counter() - started
+    print(f"Карточек: {len(results)} из {len(inns)}, не удалось: {len(failures)}, "
+          f"{elapsed:.1f} сек, {len(results) / elapsed:.1f} ИНН/сек")
+    print(pool.report())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inns', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=5, help='Запросов в секунду на канал')
+    parser.add_argument('--workers', type=int, default=10)
+    parser.add_argument('--source-addrs', type=int, default=1, help='Сколько адресов 127.0.0.x добавить в пул')
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""
+JSON-слой: загрузка и сохранение inn_cache.json, выгрузка результатов и разбор ответов
+подсказок на каждом доступном бэкенде companium.jsonio (orjson, msgspec, json).
+
+Кэш собирается из карточек синтетических страниц всех видов (fixtures), размноженных
+до --cards штук с разными ИНН.
+
+    python bench/bench_json.py --cards 50000
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from companium import engine, jsonio  # noqa: E402
+from companium.page import parse_company_page  # noqa: E402
+from fixtures import KINDS, company_page  # noqa: E402
+
+
+def build_cache(cards: int, templates: int = 50) -> dict:
+    parsed = [parse_company_page(company_page(str(7700000000 + i), kind=KINDS[i % len(KINDS)]))
+              for i in range(templates)]
+    cache = {}
+    for i in range(cards):
+        inn = str(7700000000 + i)
+        card = copy.deepcopy(parsed[i % templates])
+        card['ИНН'] = inn
+        cache[inn] = card
+    return cache
+
+
+def timed(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(args):
+    cache = build_cache(args.cards)
+    results = list(cache.values())
+    tips = [f'[{{"content": "<a href=\\"/id/{inn}\\">ООО \\"КОМПАНИЯ {inn}\\"</a>"}}]'.encode('utf-8')
+            for inn in list(cache)[:args.tips]]
+    workdir = tempfile.mkdtemp()
+    cache_path = os.path.join(workdir, 'inn_cache.json')
+    results_path = os.path.join(workdir, 'companium_data.json')
+    reference = None
+    print(f"Карточек: {len(cache)}, бэкенды: {', '.join(jsonio.BACKENDS)}")
+    for backend in jsonio.BACKENDS:
+        jsonio.use(backend)
+        save = timed(lambda: engine.save_cache(cache, cache_path), args.repeat)
+        size = os.path.getsize(cache_path)
+        load = timed(lambda: engine.load_cache(cache_path), args.repeat)
+        export = timed(lambda: engine.save_results_to_json(results, results_path), args.repeat)
+        decode = timed(lambda: [jsonio.loads(body) for body in tips], args.repeat)
+        loaded = engine.load_cache(cache_path)
+        reference = reference or loaded
+        print(f"{backend:8} сохранение кэша {save:6.2f} сек ({size / 1024 / 1024:.0f} МБ), загрузка {load:6.2f} сек, "
+              f"выгрузка результатов {export:6.2f} сек, подсказки {len(tips) / decode:,.0f}/сек"
+              f"{'' if loaded == reference else ', РАСХОЖДЕНИЕ С ПЕРВЫМ БЭКЕНДОМ'}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=50000)
+    parser.add_argument('--tips', type=int, default=20000, help='Ответов подсказок для разбора')
+    parser.add_argument('--repeat', type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+"""
+Хвостовые задержки против мока с "тяжёлым хвостом": большинство ответов быстрые, часть
+медленные, редкие — зависшие. Сравнивает фиксированный таймаут, адаптивные таймауты и
+адаптивные таймауты с хеджированием по времени обработки одного ИНН (со всеми повторами).
+
+    python bench/bench_latency.py --inns 600 --stuck 0.01
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from companium import engine  # noqa: E402
+from companium.latency import LatencyStats, percentile  # noqa: E402
+from companium.retry import backoff_delay  # noqa: E402
+from mock_server import start_server  # noqa: E402
+
+MODES = [
+    ('фиксированный', False, False),
+    ('адаптивный', True, False),
+    ('адаптивный + дубли', True, True),
+]
+
+
+def tail_latency(args, seed: int = 0):
+    rnd = random.Random(seed)
+
+    def latency():
+        x = rnd.random()
+        if x < args.stuck:
+            return args.stuck_seconds
+        if x < args.stuck + args.slow:
+            return rnd.uniform(0.3, 0.8)
+        return rnd.uniform(0.01, 0.05)
+    return latency
+
+
+async def run_mode(base_url: str, inns, args, adaptive: bool, hedge: bool):
+    engine.ADAPTIVE_TIMEOUTS = adaptive
+    engine.HEDGE = hedge
+    engine.LATENCY = LatencyStats(engine.TIMEOUT)
+    engine.RUN_STATS.clear()
+    session = await engine.create_session()
+    durations, failed = [], 0
+    queue = list(inns)
+
+    async def worker():
+        nonlocal failed
+        while queue:
+            inn = queue.pop()
+            started = time.monotonic()
+            for attempt in range(engine.MAX_RETRIES):
+                try:
+                    await engine.process_single_inn(session, inn, {})
+                    break
+                except engine.FetchError as e:
+                    if attempt + 1 < engine.MAX_RETRIES:
+                        await asyncio.sleep(backoff_delay(attempt, e.retry_base))
+            else:
+                failed += 1
+            durations.append(time.monotonic() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(args.workers)))
+    finally:
+        await session.close()
+    return durations, failed, time.perf_counter() - started
+
+
+async def main(args):
+    engine.DELAY_RANGE = (0, 0)
+    for name, adaptive, hedge in MODES:
+        server, base_url = await start_server(latency=tail_latency(args))
+        engine.BASE_URL = f"{base_url}/search/tips?query="
+        engine.DETAILS_URL = base_url
+        inns = [str(7700000000 + i) for i in range(args.inns)]
+        try:
+            durations, failed, elapsed = await run_mode(base_url, inns, args, adaptive, hedge)
+        finally:
+            await server.cleanup()
+        print(f"{name}: ИНН p50/p95/p99/max {percentile(durations, 0.5):.2f}/{percentile(durations, 0.95):.2f}/"
+              f"{percentile(durations, 0.99):.2f}/{max(durations):.2f} сек, не удалось {failed}, "
+              f"всего {elapsed:.1f} сек; {engine.run_summary()}")
+        print(engine.LATENCY.summary())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inns', type=int, default=600)
+    parser.add_argument('--workers', type=int, default=20)
+    parser.add_argument('--slow', type=float, default=0.04, help='Доля медленных ответов (0.3-0.8 сек)')
+    parser.add_argument('--stuck', type=float, default=0.01, help='Доля зависших ответов')
+    parser.add_argument('--stuck-seconds', type=float, default=8.0)
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
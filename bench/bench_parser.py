@@ -0,0 +1,56 @@
+"""
+Микробенчмарк разбора карточек: прогон parse_company_page по корпусу страниц
+с профилем по экстракторам. Корпус — синтетические страницы всех видов из fixtures
+или сохранённые настоящие страницы (<ИНН>.html) из каталога --pages.
+
+    python bench/bench_parser.py --pages 200 --padding 400
+    python bench/bench_parser.py --dir saved_pages --repeat 3
+
+Проверка результата разбора и замер через pytest-benchmark — tests/test_parser_bench.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from companium import page  # noqa: E402
+from fixtures import KINDS, company_page  # noqa: E402
+
+
+def load_corpus(args):
+    if args.dir:
+        corpus = []
+        for name in sorted(os.listdir(args.dir)):
+            if name.endswith('.html'):
+                with open(os.path.join(args.dir, name), encoding='utf-8') as f:
+                    corpus.append(f.read())
+        return corpus
+    return [company_page(str(7700000000 + i), padding=args.padding, kind=KINDS[i % len(KINDS)])
+            for i in range(args.pages)]
+
+
+def main(args):
+    corpus = load_corpus(args)
+    size = sum(len(html.encode('utf-8')) for html in corpus)
+    profile = page.enable_profiling()
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for html in corpus:
+            page.parse_company_page(html)
+    elapsed = time.perf_counter() - started
+
+    pages = len(corpus) * args.repeat
+    print(f"Страниц: {pages}, {size / len(corpus) / 1024:.0f} КБ в среднем, "
+          f"{elapsed:.2f} сек, {pages / elapsed:.1f} стр/сек, {1000 * elapsed / pages:.2f} мс/стр")
+    print(profile.report())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=100, help='Число синтетических страниц')
+    parser.add_argument('--padding', type=int, default=400, help='Объём однотипного HTML на странице')
+    parser.add_argument('--dir', help='Каталог с сохранёнными страницами <ИНН>.html вместо синтетики')
+    parser.add_argument('--repeat', type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,142 @@
+"""
+Задержки цикла событий из-за записи на диск при прогоне против мока с большим кэшем.
+
+Пока идёт process_inn_list, отдельная задача спит по 10 мс и замеряет опоздание
+пробуждения — это время, на которое цикл был занят чем-то синхронным. Мок работает
+в отдельном процессе, а разбор страниц (BeautifulSoup, тоже в цикле) подменён готовой
+карточкой, чтобы остались только задержки записи. Режим "в цикле" — как было до фоновой записи: те же задания выполняются сразу,
+а полный снимок кэша пишется после каждой пачки.
+
+    python bench/bench_writer.py --cached 20000 --inns 300
+"""
+import argparse
+import asyncio
+import copy
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from companium import engine  # noqa: E402
+from companium.cardtable import CardTable  # noqa: E402
+from companium.latency import percentile  # noqa: E402
+from companium.store import open_store  # noqa: E402
+from companium.writer import BackgroundWriter  # noqa: E402
+from bench_json import build_cache  # noqa: E402
+
+TICK = 0.01
+
+
+class InlineWriter:
+    """Выполняет задания сразу, в вызывающем потоке (прежнее поведение движка)."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def append(self, path, data):
+        with open(path, 'ab') as f:
+            f.write(data)
+
+    def call(self, fn, *args, sync=None, **kwargs):
+        fn(*args, **kwargs)
+
+    def truncate(self, path):
+        open(path, 'wb').close()
+
+    def flush(self):
+        pass
+
+    async def room(self):
+        pass
+
+    def close(self):
+        pass
+
+    def summary(self):
+        return 'в цикле'
+
+
+async def watch_loop(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+def start_mock() -> tuple:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mock_server.py'),
+                               '--port', str(port), '--latency', '0.01'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def run_mode(args, workdir: str, inline: bool):
+    cache = CardTable(build_cache(args.cached))
+    template = build_cache(1).popitem()[1]
+    engine.CACHE_FILE = os.path.join(workdir, 'inn_cache.json')
+    engine.save_cache(cache, engine.CACHE_FILE)
+    engine.parse_company_page = lambda html: copy.deepcopy(template)
+    engine.BackgroundWriter = InlineWriter if inline else BackgroundWriter
+    engine.SNAPSHOT_EVERY = 0 if inline else args.snapshot_every
+    store = open_store(os.path.join(workdir, 'companium.db'))
+
+    server, base_url = start_mock()
+    engine.BASE_URL = f"{base_url}/search/tips?query="
+    engine.DETAILS_URL = base_url
+    inns = [str(7800000000 + i) for i in range(args.inns)]
+    lags, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(watch_loop(lags, stop))
+    started = time.perf_counter()
+    try:
+        results = await engine.process_inn_list(inns, store)
+    finally:
+        stop.set()
+        await ticker
+        server.terminate()
+        server.wait()
+        store.close()
+    elapsed = time.perf_counter() - started
+    print(f"{'в цикле' if inline else 'фоновая запись'}: получено {len(results)} за {elapsed:.1f} сек, "
+          f"опоздание цикла p50/p99/max {percentile(lags, 0.5) * 1000:.1f}/{percentile(lags, 0.99) * 1000:.1f}/"
+          f"{max(lags) * 1000:.1f} мс, стопов дольше 50 мс {sum(lag > 0.05 for lag in lags)} "
+          f"на {sum(lag for lag in lags if lag > 0.05):.1f} сек, в кэше {len(engine.load_cache(engine.CACHE_FILE))} карточек")
+
+
+async def main(args):
+    print(f"Кэш {args.cached} карточек, новых ИНН {args.inns}")
+    for inline in (True, False):
+        with tempfile.TemporaryDirectory() as workdir:
+            await run_mode(args, workdir, inline)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cached', type=int, default=20000, help='Карточек в кэше до прогона')
+    parser.add_argument('--inns', type=int, default=300, help='Новых ИНН для скачивания')
+    parser.add_argument('--snapshot-every', type=float, default=engine.SNAPSHOT_EVERY)
+    parser.add_argument('--fsync', default=engine.FSYNC)
+    cli = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    engine.DELAY_RANGE = (0, 0)
+    engine.FSYNC = cli.fsync
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # failed_inns.json и прочие файлы прогона — во временный каталог
+        try:
+            asyncio.run(main(cli))
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,85 @@
+"""
+Синтетические страницы companium.ru для мок-сервера и бенчмарков.
+
+Разметка повторяет селекторы, на которые опирается companium.page.parse_company_page,
+а объём и повторяемость текста — реальные карточки (сотни КБ однотипного HTML).
+"""
+import random
+
+STATUSES = [
+    ('text-success fw-bold', 'Действующая компания'),
+    ('text-danger fw-bold', 'Организация ликвидирована 14 марта 2021'),
+    ('fw-bold special-status', 'В процессе банкротства'),
+]
+
+OKVED = [
+    ('68.20', 'Аренда и управление собственным или арендованным недвижимым имуществом'),
+    ('41.20', 'Строительство жилых и нежилых зданий'),
+    ('46.90', 'Торговля оптовая неспециализированная'),
+    ('49.41', 'Деятельность автомобильного грузового транспорта'),
+    ('01.11', 'Выращивание зерновых культур'),
+]
+
+
+# Варианты страниц для корпуса бенчмарков
+KINDS = ('active', 'liquidated', 'individual', 'no_financials', 'managed')
+
+
+def company_page(inn: str, seed: int = 0, padding: int = 400, kind: str = None) -> str:
+    rnd = random.Random(f"{inn}-{seed}")
+    status_class, status_text = rnd.choice(STATUSES)
+    if kind == 'active':
+        status_class, status_text = STATUSES[0]
+    elif kind == 'liquidated':
+        status_class, status_text = STATUSES[1]
+    financials = f"""<div><div class="fw-bold">Финансовая отчетность за 2023 год</div>
+<div><a class="link-pseudo">Выручка</a> {rnd.randint(1, 900)} млн руб.
+<span class="financial-statement-change" data-bs-title="за год">+5%</span></div>
+<div><a class="link-pseudo">Чистая прибыль</a> {rnd.randint(1, 90)} млн руб.</div></div>
+<span id="accounting-huge-year">{rnd.choice(['2019', '2021', '2023'])}</span>"""
+    head = f"""<div class="d-flex"><div class="flex-grow-1 ms-3"><strong class="fw-bold">Генеральный директор</strong>
+<a href="/people/inn/{inn}00">Иванов Иван Иванович</a><span class="copy">{inn}00</span></div></div>"""
+    founders = f"""<div class="mb-3"><strong class="fw-bold">Учредители</strong>
+<a href="/people/inn/{inn}11">Петров Пётр Петрович</a><div class="text-secondary">с 1 июня 2015</div></div>"""
+    if kind in ('individual', 'no_financials'):
+        financials = ''
+    if kind == 'individual':
+        status_class, status_text = STATUSES[2]
+        head = ''
+        founders = '<div class="mb-3"><strong class="fw-bold">Учредители</strong><div>Нет сведений</div></div>'
+    elif kind == 'managed':
+        head = f"""<div class="mb-3"><div class="fw-bold">Управляющая организация</div>
+<a href="/id/{inn[::-1]}">ООО "УК {inn[::-1]}"</a><div class="text-secondary">с 3 мая 2019</div></div>"""
+    okved_rows = ''.join(
+        f'<tr><td>{code}</td><td><a href="/okved/{code}">{text}</a>'
+        f'<span class="extra-tip">основной</span></td></tr>'
+        for code, text in rnd.sample(OKVED, 3)
+    )
+    filler = ''.join(
+        f'<div class="mb-3"><div class="text-secondary">Запись {i} о событии компании ИНН {inn}: '
+        f'изменение сведений в ЕГРЮЛ, внесение записи о юридическом лице.</div></div>'
+        for i in range(padding)
+    )
+    sections = ''.join(f'<section class="x-section"><div>Раздел {i}</div></section>' for i in range(9))
+    return f"""<!DOCTYPE html>
+<html lang="ru"><head><meta charset="utf-8"><title>ООО Компания {inn}</title></head><body>
+<h1 class="mb-2">ООО "КОМПАНИЯ {inn}"</h1>
+<div class="fw-bold mb-2">ОБЩЕСТВО С ОГРАНИЧЕННОЙ ОТВЕТСТВЕННОСТЬЮ "КОМПАНИЯ {inn}"</div>
+<div class="{status_class}">{status_text}</div>
+<span id="copy-ogrn">1{inn}12</span><span id="copy-inn">{inn}</span>
+<span id="copy-kpp">{inn[:4]}01001</span><span id="copy-okpo">{rnd.randint(10 ** 7, 10 ** 8)}</span>
+<span id="copy-address">г. Москва, ул. Примерная, д. {rnd.randint(1, 200)}</span>
+<div><div class="fw-bold">Организационно-правовая форма</div><div>Общество с ограниченной ответственностью</div></div>
+<div><div class="fw-bold">Форма собственности</div><div>Частная собственность</div></div>
+<div><div class="fw-bold">Система налогообложения</div><div>Общая (ОСНО)</div>
+<div class="text-secondary">Согласно данным ФНС за 2023 год</div></div>
+{financials}
+{head}
+{founders}
+<div>Санкционные списки</div><div>Не найдена в санкционных списках</div>
+<a class="link-black" href="tel:+74950000000">+7 495 000-00-00</a><a href="mailto:info@example.ru">info@example.ru</a>
+<strong class="fw-bold d-block mt-3 mb-1">Сайты</strong><a href="https://example.ru">example.ru</a>
+{filler}
+<table class="table table-md table-striped">{okved_rows}</table>
+{sections}<section class="x-section"><div>Нет сведений об участии компании в госзакупках</div></section>
+</body></html>"""
@@ -0,0 +1,65 @@
+"""
+Локальный HTTP-прокси — стенд для проверки пула каналов (companium.egress).
+
+Пересылает запросы в абсолютной форме (GET http://host/path) на целевой сервер.
+Можно добавить задержку и доля ответов 429, чтобы эмулировать медленный или
+"задушенный" сайтом выходной адрес.
+
+    python bench/mock_proxy.py --port 3128 --throttle 0.3
+"""
+import argparse
+import asyncio
+import random
+
+import aiohttp
+from aiohttp import web
+
+HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authorization', 'proxy-connection', 'transfer-encoding', 'host'}
+
+
+def make_proxy(latency: float = 0, throttle: float = 0, seed: int = 0) -> web.Application:
+    """throttle — доля запросов, на которые прокси сразу отвечает 429."""
+    rnd = random.Random(seed)
+
+    async def on_startup(app):
+        app['client'] = aiohttp.ClientSession(auto_decompress=False)
+
+    async def on_cleanup(app):
+        await app['client'].close()
+
+    async def forward(request: web.Request):
+        if latency:
+            await asyncio.sleep(latency)
+        if rnd.random() < throttle:
+            return web.Response(status=429)
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_HEADERS}
+        async with request.app['client'].get(str(request.url), headers=headers) as upstream:
+            body = await upstream.read()
+            out = {k: v for k, v in upstream.headers.items()
+                   if k.lower() not in HOP_HEADERS and k.lower() != 'content-length'}
+            return web.Response(status=upstream.status, body=body, headers=out)
+
+    app = web.Application()
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_route('GET', '/{tail:.*}', forward)
+    return app
+
+
+async def start_proxy(port: int = 0, **kwargs):
+    """Запускает прокси в текущем цикле событий; возвращает (runner, proxy_url)."""
+    runner = web.AppRunner(make_proxy(**kwargs), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=3128)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--throttle', type=float, default=0, help='Доля ответов 429')
+    args = parser.parse_args()
+    web.run_app(make_proxy(args.latency, args.throttle), host='127.0.0.1', port=args.port, access_log=None)
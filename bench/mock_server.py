@@ -0,0 +1,105 @@
+"""
+Локальный мок companium.ru: /search/tips?query=<ИНН> и /id/<ИНН> с синтетическими страницами.
+
+Ответ сжимается по accept-encoding клиента (zstd/br/gzip/deflate), можно ограничить
+пропускную способность (--bandwidth, КБ/с на ответ) и добавить задержку перед ответом.
+
+    python bench/mock_server.py --port 8080
+"""
+import argparse
+import asyncio
+import json
+import zlib
+
+from aiohttp import web
+
+from fixtures import company_page
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+WRITE_CHUNK = 8 * 1024
+
+
+def compress(body: bytes, accept: str):
+    accepted = [e.split(';')[0].strip() for e in accept.split(',')]
+    if 'zstd' in accepted and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(body), 'zstd'
+    if 'br' in accepted and brotli is not None:
+        return brotli.compress(body, quality=5), 'br'
+    if 'gzip' in accepted:
+        c = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return c.compress(body) + c.flush(), 'gzip'
+    if 'deflate' in accepted:
+        return zlib.compress(body, 6), 'deflate'
+    return body, None
+
+
+def make_app(bandwidth_kb: float = 0, latency: float = 0, status_for=None) -> web.Application:
+    """
+    status_for(inn) -> HTTP-статус позволяет эмулировать 429/5xx для части ИНН;
+    latency — число или функция без аргументов (задержка каждого ответа, сек).
+    """
+    pages = {}
+
+    async def send(request, body: bytes, content_type: str):
+        delay = latency() if callable(latency) else latency
+        if delay:
+            await asyncio.sleep(delay)
+        data, encoding = compress(body, request.headers.get('Accept-Encoding', ''))
+        response = web.StreamResponse(headers={'Content-Type': f'{content_type}; charset=utf-8'})
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.content_length = len(data)
+        await response.prepare(request)
+        for i in range(0, len(data), WRITE_CHUNK):
+            await response.write(data[i:i + WRITE_CHUNK])
+            if bandwidth_kb:
+                await asyncio.sleep(WRITE_CHUNK / 1024 / bandwidth_kb)
+        await response.write_eof()
+        return response
+
+    async def tips(request):
+        inn = request.query.get('query', '')
+        status = status_for(inn) if status_for else 200
+        if status != 200:
+            return web.Response(status=status)
+        content = f'<a href="/id/{inn}">ООО "КОМПАНИЯ {inn}"</a>'
+        return await send(request, json.dumps([{'content': content}], ensure_ascii=False).encode(), 'application/json')
+
+    async def details(request):
+        inn = request.match_info['inn']
+        if inn not in pages:
+            pages[inn] = company_page(inn).encode('utf-8')
+        return await send(request, pages[inn], 'text/html')
+
+    app = web.Application()
+    app.router.add_get('/search/tips', tips)
+    app.router.add_get('/id/{inn}', details)
+    return app
+
+
+async def start_server(port: int = 0, **kwargs):
+    """Запускает мок в текущем цикле событий; возвращает (runner, base_url)."""
+    runner = web.AppRunner(make_app(**kwargs))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--bandwidth', type=float, default=0, help='КБ/с на ответ, 0 — без ограничения')
+    parser.add_argument('--latency', type=float, default=0, help='Задержка перед ответом, сек')
+    args = parser.parse_args()
+    web.run_app(make_app(args.bandwidth, args.latency), host='127.0.0.1', port=args.port)
@@ -0,0 +1,3 @@
+"""
+Общие модули скрапера companium.ru: хранилище карточек, движок запросов и утилиты пайплайна.
+"""
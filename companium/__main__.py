@@ -0,0 +1,5 @@
+import sys
+
+from companium.cli import main
+
+sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Бинарный кэш карточек: сжатые блоки записей и индекс ИНН -> (блок, смещение, длина).
+
+Записи — строки словарной таблицы CardTable ([набор ключей, значения...]), упакованные
+msgpack, если он установлен, иначе компактным JSON. Блоки по BLOCK_RECORDS записей
+сжимаются zstd (или zlib, если zstd недоступен), поэтому одну карточку можно прочитать,
+распаковав только её блок, а не весь файл.
+
+Формат файла:
+    MAGIC | кодек (8 байт) | блок 0 | блок 1 | ... | индекс | смещение и размер индекса (<QQ) | MAGIC
+Индекс — сжатый тем же кодеком JSON: кодек записей, таблицы CardTable, [смещение, размер]
+блоков и {ИНН: [блок, смещение в блоке, длина]}.
+"""
+import os
+import struct
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+from companium import jsonio
+from companium.cardtable import FORMAT, CardTable
+from companium.compression import block_codec, compress_block, decompress_block
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SUFFIX = '.bin'  # кэш с таким расширением движок пишет в бинарном формате
+MAGIC = b'CMPCACH1'
+FOOTER = struct.Struct('<QQ')
+LENGTH = struct.Struct('<I')
+CODEC = struct.Struct('8s')
+BLOCK_RECORDS = 256  # записей в блоке: меньше — быстрее чтение одной карточки, больше — лучше сжатие
+OPEN_BLOCKS = 8  # распакованных блоков, которые читатель держит в памяти
+
+
+def record_codec() -> str:
+    return 'msgpack' if msgpack is not None else 'json'
+
+
+def _pack(row: list, codec: str) -> bytes:
+    if codec == 'msgpack':
+        return msgpack.packb(row, use_bin_type=True)
+    return jsonio.dumps(row)
+
+
+def _unpack(raw: bytes, codec: str) -> list:
+    if codec == 'msgpack':
+        if msgpack is None:
+            raise ValueError("Кэш записан через msgpack, а он не установлен")
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    return jsonio.loads(raw)
+
+
+def is_block_cache(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_block_cache(cards: Mapping, path: str, block_records: int = BLOCK_RECORDS,
+                      codec: Optional[str] = None, level: Optional[int] = None) -> int:
+    """
+    Пишет карточки (CardTable или обычный словарь) во временный файл и атомарно
+    подменяет path. Возвращает размер файла.
+    """
+    table = cards if isinstance(cards, CardTable) else CardTable(cards)
+    codec = codec or block_codec()
+    records = record_codec()
+    blocks, index = [], {}
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(CODEC.pack(codec.encode('ascii')))
+        chunk, size = [], 0
+
+        def flush():
+            nonlocal chunk, size
+            data = compress_block(b''.join(chunk), codec, level)
+            blocks.append([f.tell(), len(data)])
+            f.write(data)
+            chunk, size = [], 0
+
+        for inn, row in table.rows():
+            raw = _pack(row, records)
+            index[inn] = [len(blocks), size + LENGTH.size, len(raw)]
+            chunk += [LENGTH.pack(len(raw)), raw]
+            size += LENGTH.size + len(raw)
+            if len(chunk) >= 2 * block_records:
+                flush()
+        if chunk:
+            flush()
+        head = {'format': FORMAT, 'records': records, **table.lookups(),
+                'blocks': blocks, 'cards': index}
+        data = compress_block(jsonio.dumps(head), codec, level)
+        offset = f.tell()
+        f.write(data)
+        f.write(FOOTER.pack(offset, len(data)))
+        f.write(MAGIC)
+        end = f.tell()
+    os.replace(tmp, path)
+    return end
+
+
+class BlockCache(Mapping):
+    """Чтение карточек по одной: распаковывается только блок нужного ИНН."""
+
+    def __init__(self, path: str, open_blocks: int = OPEN_BLOCKS):
+        self.path = path
+        self.open_blocks = open_blocks
+        self._file = open(path, 'rb')
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: не бинарный кэш карточек")
+        self.codec = CODEC.unpack(self._file.read(CODEC.size))[0].rstrip(b'\0').decode('ascii')
+        self._file.seek(-FOOTER.size - len(MAGIC), os.SEEK_END)
+        tail = self._file.read()
+        if tail[-len(MAGIC):] != MAGIC:
+            raise ValueError(f"{path}: не бинарный кэш карточек")
+        offset, size = FOOTER.unpack(tail[:FOOTER.size])
+        self._file.seek(offset)
+        with jsonio.paused_gc():
+            head = jsonio.loads(decompress_block(self._file.read(size), self.codec))
+        self.records = head['records']
+        self.blocks = head['blocks']
+        self.index: Dict[str, list] = head['cards']
+        self.table = CardTable.from_doc({**head, 'cards': {}})
+        self._blocks: OrderedDict = OrderedDict()
+
+    def _block(self, number: int) -> bytes:
+        data = self._blocks.get(number)
+        if data is None:
+            offset, size = self.blocks[number]
+            self._file.seek(offset)
+            data = decompress_block(self._file.read(size), self.codec)
+            self._blocks[number] = data
+            if len(self._blocks) > self.open_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(number)
+        return data
+
+    def row(self, inn: str) -> list:
+        block, start, length = self.index[inn]
+        return _unpack(self._block(block)[start:start + length], self.records)
+
+    def __getitem__(self, inn: str) -> Any:
+        return self.table.decode_row(self.row(inn))
+
+    def __contains__(self, inn: object) -> bool:
+        return inn in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def to_table(self) -> CardTable:
+        """Весь кэш в память: блоки распаковываются по порядку, по одному разу."""
+        rows = {}
+        with jsonio.paused_gc():
+            for inn, (block, start, length) in self.index.items():
+                rows[inn] = _unpack(self._block(block)[start:start + length], self.records)
+        return CardTable.from_doc({'format': FORMAT, **self.table.lookups(), 'cards': rows})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'BlockCache':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
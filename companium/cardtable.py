@@ -0,0 +1,198 @@
+"""
+Словарное кодирование карточек для кэша inn_cache.json.
+
+В карточках десятки тысяч раз повторяются одни и те же названия полей, статусы,
+формы собственности, системы налогообложения и виды деятельности ОКВЭД (код, текст,
+ссылка — а различных кодов всего несколько тысяч). CardTable хранит это один раз:
+
+- shapes — наборы ключей карточек (обычно их единицы), ключи интернированы;
+- strings — значения полей из DICTIONARY_FIELDS;
+- activities — уникальные записи "Виды деятельности";
+- сама карточка — CardRecord (__slots__): номер набора ключей и кортеж значений,
+  где словарные поля и виды деятельности заменены целыми ссылками (не-словарь из
+  старого кэша, например null, хранится как есть с номером набора -1).
+
+Обращение cache[inn] собирает обычный словарь (каждый раз новый, вместе с вложенными
+списками и словарями — его можно менять, кэш от этого не меняется), поэтому CardTable
+подставляется везде, где раньше был dict с карточками. Записанная карточка тоже копируется:
+записи таблицы ни с кем не делят изменяемые значения. Файл в формате
+таблицы — JSON {"format", "shapes", "strings", "activities", "cards": {ИНН: [набор, значения...]}}.
+"""
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Hashable, Iterator, List, Tuple
+
+from companium import jsonio
+
+FORMAT = "companium-cards/1"
+
+# Поля со строковыми значениями из небольшого словаря
+DICTIONARY_FIELDS = frozenset({
+    'Статус',
+    'Организационно-правовая форма',
+    'Форма собственности',
+    'Система налогообложения',
+    'Санкционные списки',
+})
+ACTIVITIES = 'Виды деятельности'
+
+
+class CardRecord:
+    __slots__ = ('shape', 'values')
+
+    def __init__(self, shape: int, values: tuple):
+        self.shape = shape
+        self.values = values
+
+
+class _Lookup:
+    """Список уникальных значений с обратным индексом."""
+    __slots__ = ('items', 'ids')
+
+    def __init__(self, items=()):
+        self.items: List[Any] = []
+        self.ids: Dict[Hashable, int] = {}
+        for item in items:
+            self.add(item, self.key(item))
+
+    def copy(self) -> '_Lookup':
+        lookup = _Lookup()
+        lookup.items = self.items.copy()
+        lookup.ids = self.ids.copy()
+        return lookup
+
+    @staticmethod
+    def key(item: Any) -> Hashable:
+        if isinstance(item, dict):
+            key = tuple(item.items())
+            try:
+                hash(key)
+            except TypeError:
+                # Вложенные списки/словари в значениях: ключ — JSON записи
+                return jsonio.dumps(item)
+            return key
+        return item
+
+    def add(self, item: Any, key: Hashable) -> int:
+        index = self.ids.get(key)
+        if index is None:
+            index = self.ids[key] = len(self.items)
+            self.items.append(item)
+        return index
+
+
+def _copied(value: Any) -> Any:
+    """Копия вложенных словарей и списков (значения карточек — JSON, так что этого достаточно)."""
+    if isinstance(value, dict):
+        return {k: _copied(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copied(v) for v in value]
+    return value
+
+
+def is_table(doc: Any) -> bool:
+    return isinstance(doc, dict) and doc.get('format') == FORMAT
+
+
+class CardTable(MutableMapping):
+    """Словарь ИНН -> карточка с общими таблицами ключей, строк и видов деятельности."""
+
+    def __init__(self, cards=None):
+        self.shapes = _Lookup()
+        self.strings = _Lookup()
+        self.activities = _Lookup()
+        self._rows: Dict[str, CardRecord] = {}
+        if cards:
+            self.update(cards)
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'CardTable':
+        """Таблица из разобранного файла; строки карточек не перекодируются."""
+        table = cls()
+        with jsonio.paused_gc():
+            table.shapes = _Lookup(tuple(sys.intern(k) for k in shape) for shape in doc['shapes'])
+            table.strings = _Lookup(doc['strings'])
+            table.activities = _Lookup(doc['activities'])
+            table._rows = {inn: CardRecord(row[0], tuple(row[1:])) for inn, row in doc['cards'].items()}
+        return table
+
+    def lookups(self) -> Dict[str, Any]:
+        return {'shapes': self.shapes.items, 'strings': self.strings.items, 'activities': self.activities.items}
+
+    def rows(self) -> Iterator[Tuple[str, list]]:
+        """Закодированные строки (ИНН, [набор, значения...]) в порядке вставки."""
+        for inn, rec in self._rows.items():
+            yield inn, [rec.shape, *rec.values]
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {'format': FORMAT, **self.lookups(), 'cards': dict(self.rows())}
+
+    def decode_row(self, row: list) -> Any:
+        """Карточка из закодированной строки (по таблицам этого объекта)."""
+        if row[0] < 0:
+            return _copied(row[1])
+        return {k: self._decode(k, v) for k, v in zip(self.shapes.items[row[0]], row[1:])}
+
+    def dump(self, path: str):
+        with jsonio.paused_gc():
+            jsonio.dump(self.to_doc(), path)
+
+    def copy(self) -> 'CardTable':
+        """Снимок для записи в фоне: записи карточек не меняются, копируются только словари и списки."""
+        table = CardTable()
+        table.shapes = self.shapes.copy()
+        table.strings = self.strings.copy()
+        table.activities = self.activities.copy()
+        table._rows = self._rows.copy()
+        return table
+
+    def _encode(self, key: str, value: Any) -> Any:
+        # Незакодированные значения тех же полей (не строка / не словарь) заворачиваются в [значение]
+        if key in DICTIONARY_FIELDS:
+            if isinstance(value, str):
+                return self.strings.add(value, value)
+            return [_copied(value)] if value is not None else None
+        if key == ACTIVITIES and isinstance(value, list):
+            return [self.activities.add(_copied(a), _Lookup.key(a)) if isinstance(a, dict) else [_copied(a)]
+                    for a in value]
+        return _copied(value)
+
+    def _decode(self, key: str, value: Any) -> Any:
+        if key in DICTIONARY_FIELDS:
+            if isinstance(value, int):
+                return self.strings.items[value]
+            return _copied(value[0]) if value is not None else None
+        if key == ACTIVITIES and isinstance(value, list):
+            return [_copied(self.activities.items[a]) if isinstance(a, int) else _copied(a[0]) for a in value]
+        return _copied(value)
+
+    def __getitem__(self, inn: str) -> Dict[str, Any]:
+        rec = self._rows[inn]
+        if rec.shape < 0:
+            return _copied(rec.values[0])
+        keys = self.shapes.items[rec.shape]
+        return {k: self._decode(k, v) for k, v in zip(keys, rec.values)}
+
+    def __setitem__(self, inn: str, card: Dict[str, Any]):
+        if not isinstance(card, dict):
+            self._rows[inn] = CardRecord(-1, (_copied(card),))
+            return
+        shape = tuple(sys.intern(k) for k in card)
+        self._rows[inn] = CardRecord(self.shapes.add(shape, shape),
+                                     tuple(self._encode(k, v) for k, v in zip(shape, card.values())))
+
+    def __delitem__(self, inn: str):
+        del self._rows[inn]
+
+    def __contains__(self, inn: object) -> bool:
+        return inn in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Tuple[int, int, int]:
+        """(наборов ключей, словарных строк, видов деятельности)."""
+        return len(self.shapes.items), len(self.strings.items), len(self.activities.items)
@@ -0,0 +1,97 @@
+"""
+Лента изменений: построчный JSONL с разницей между свежей и закэшированной карточкой.
+
+Каждая строка — {"inn", "field", "old", "new", "ts"}. Фильтры и алерты читают только
+дельты (например, переход Статус -> ликвидация) вместо пересканирования всего набора.
+Опционально каждая изменившаяся версия карточки сохраняется в таблицу card_versions
+хранилища — получается история карточек по ИНН.
+"""
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from companium import jsonio
+from companium.inn import parse_inn
+
+CHANGES_FILE = "changes.jsonl"
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS card_versions (
+    inn INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    card TEXT NOT NULL,
+    PRIMARY KEY (inn, fetched_at)
+)
+"""
+
+
+def diff_cards(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> List[Tuple[str, Any, Any]]:
+    """Список (поле, старое, новое) по верхнеуровневым полям карточки."""
+    old = old or {}
+    changed = []
+    for field in list(old) + [f for f in new if f not in old]:
+        before, after = old.get(field), new.get(field)
+        if before != after:
+            changed.append((field, before, after))
+    return changed
+
+
+class ChangeFeed:
+    def __init__(self, path: str = CHANGES_FILE, store: Optional[sqlite3.Connection] = None):
+        self.path = path
+        self.store = store
+        self.changed_cards = 0
+        self._file = open(path, 'ab')
+        if store is not None:
+            store.execute(HISTORY_SCHEMA)
+
+    def record(self, inn: str, old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> int:
+        """
+        Пишет изменения карточки; возвращает число изменившихся полей.
+        Для ИНН без предыдущей версии в ленту ничего не пишется, только первая версия в историю.
+        """
+        changes = diff_cards(old, new) if old is not None else []
+        if old is not None and not changes:
+            return 0
+        ts = time.time()
+        self._save_version(inn, ts, new)
+        if not changes:
+            return 0
+        for field, before, after in changes:
+            self._file.write(jsonio.dumps({'inn': inn, 'field': field, 'old': before, 'new': after, 'ts': ts}) + b'\n')
+        self._file.flush()
+        self.changed_cards += 1
+        return len(changes)
+
+    def _save_version(self, inn: str, ts: float, card: Dict[str, Any]):
+        key = parse_inn(inn)
+        if self.store is not None and key is not None:
+            with self.store:
+                self.store.execute("INSERT OR REPLACE INTO card_versions VALUES (?, ?, ?)",
+                                   (key[0], ts, jsonio.dumps(card).decode('utf-8')))
+
+    def close(self):
+        self._file.close()
+
+
+def read_changes(path: str = CHANGES_FILE, fields: Optional[Sequence[str]] = None,
+                 since: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Изменения из ленты, опционально только по полям fields и не раньше since (unix time)."""
+    with open(path, 'rb') as f:
+        for line in f:
+            change = jsonio.loads(line)
+            if fields and change['field'] not in fields:
+                continue
+            if since is not None and change['ts'] < since:
+                continue
+            yield change
+
+
+def card_history(conn: sqlite3.Connection, inn: str) -> List[Tuple[float, Dict[str, Any]]]:
+    key = parse_inn(inn)
+    if key is None:
+        return []
+    conn.execute(HISTORY_SCHEMA)
+    rows = conn.execute("SELECT fetched_at, card FROM card_versions WHERE inn = ? ORDER BY fetched_at",
+                        (key[0],)).fetchall()
+    return [(ts, jsonio.loads(card)) for ts, card in rows]
@@ -0,0 +1,438 @@
+"""
+Единая точка входа: python -m companium <команда>.
+
+Тяжёлые библиотеки (pandas, aiohttp, bs4) импортируются внутри команд, которым
+они нужны, поэтому быстрые команды (cache-stats, --help) стартуют за десятки миллисекунд.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+
+def cmd_scrape(args):
+    import asyncio
+    import logging
+
+    from companium import engine
+    from companium.changes import ChangeFeed
+    from companium.store import open_store, put_cards
+
+    logging.basicConfig(level=logging.INFO)
+    engine.HEDGE = args.hedge
+    engine.ADAPTIVE_TIMEOUTS = not args.fixed_timeout
+    engine.FSYNC = args.fsync
+    engine.SNAPSHOT_EVERY = args.snapshot_every
+    if args.profile_parse:
+        from companium.page import enable_profiling
+        enable_profiling()
+    inn_list = engine.load_unique_inn_list(args.input, column=args.column)
+    fields = [f.strip() for f in args.fields.split(',')] if args.fields else None
+    egress = [e.strip() for e in args.egress.split(',') if e.strip()] if args.egress else None
+    store = open_store(args.store) if args.store else None
+    try:
+        if args.shards > 1:
+            from companium.shard import run_sharded
+            pairs = run_sharded(inn_list, args.shards)
+            if store is not None:
+                put_cards(store, pairs)
+            results = [card for _, card in pairs]
+        else:
+            feed = ChangeFeed(args.changes, store) if args.changes else None
+            try:
+                results = asyncio.run(engine.process_inn_list(inn_list, store, fields, args.refresh, feed,
+                                                              args.low_memory, args.spill_after,
+                                                              args.watermark_every, egress, args.egress_rate,
+                                                              f"{os.path.splitext(args.output)[0]}.spill.jsonl"))
+            finally:
+                if feed is not None:
+                    feed.close()
+    finally:
+        if store is not None:
+            store.close()
+    engine.save_results_to_csv(results, args.output)
+    print(f"Получено {len(results)} карточек компаний из {len(inn_list)} ИНН -> {args.output}")
+
+
+# Опции scrape, которые шардированный прогон (run_sharded) не передаёт в процессы-шарды
+UNSHARDED_OPTIONS = ('fields', 'refresh', 'changes', 'low_memory', 'spill_after', 'watermark_every', 'egress',
+                     'egress_rate', 'hedge', 'fixed_timeout', 'fsync', 'snapshot_every', 'profile_parse')
+
+
+def check_scrape(parser: argparse.ArgumentParser, args):
+    # Изменения пишутся только при перекачке полных карточек поверх кэша
+    if args.changes and (not args.refresh or args.fields):
+        parser.error("--changes работает только вместе с --refresh и без --fields")
+    if args.watermark_every < 0 or args.spill_after < 0:
+        parser.error("--watermark-every и --spill-after не могут быть отрицательными")
+    if args.shards > 1:
+        used = ['--' + name.replace('_', '-') for name in UNSHARDED_OPTIONS
+                if getattr(args, name) != parser.get_default(name)]
+        if used:
+            parser.error(f"с --shards > 1 не поддерживаются: {', '.join(used)}")
+
+
+def cmd_enrich(args):
+    import logging
+    from datetime import timedelta
+
+    import pandas as pd
+
+    from companium.enrich import enrich
+
+    logging.basicConfig(level=logging.INFO)
+    df = pd.read_csv(args.input, dtype={args.column: str})
+    fields = [f.strip() for f in args.fields.split(',')] if args.fields else None
+    max_age = timedelta(days=args.max_age) if args.max_age is not None else None
+    result = enrich(df, args.column, fields, max_age, args.store, fetch=not args.no_fetch)
+    result.to_csv(args.output, index=False)
+    stats = result.attrs['enrich']
+    print(f"ИНН: {stats['inns']}, из хранилища {stats['hits']}, скачано {stats['fetched']}, "
+          f"без данных {stats['failed']} -> {args.output}")
+
+
+def cmd_enqueue(args):
+    from companium.engine import load_unique_inn_list
+    from companium.jobs import JobTable
+
+    inn_list = load_unique_inn_list(args.input, column=args.column)
+    jobs = JobTable(args.jobs)
+    try:
+        added = jobs.enqueue(inn_list, args.batch_size)
+        print(f"Добавлено ИНН: {added} из {len(inn_list)}, пачек: {jobs.progress()}")
+    finally:
+        jobs.close()
+
+
+def cmd_work(args):
+    import asyncio
+    import logging
+
+    from companium import jobs as job_module
+    from companium.store import open_store
+
+    logging.basicConfig(level=logging.INFO)
+    egress = [e.strip() for e in args.egress.split(',') if e.strip()] if args.egress else None
+    jobs = job_module.JobTable(args.jobs, lease_seconds=args.lease)
+    job_module.HEARTBEAT_EVERY = args.lease / 3
+    store = open_store(args.store, wal=False)
+    try:
+        batches = asyncio.run(job_module.run_node(jobs, store, args.node, egress, args.egress_rate))
+        print(f"Закрыто пачек: {batches}; состояние очереди: {jobs.progress()}")
+    finally:
+        store.close()
+        jobs.close()
+
+
+def cmd_jobs(args):
+    from companium.jobs import JobTable
+
+    jobs = JobTable(args.jobs)
+    try:
+        print(f"Пачек: {jobs.progress()}")
+        for node, leased in jobs.nodes().items():
+            print(f"  {node}: в аренде {leased}")
+    finally:
+        jobs.close()
+
+
+def cmd_crawl(args):
+    import asyncio
+    import logging
+
+    from companium import engine
+    from companium.crawl import crawl
+
+    logging.basicConfig(level=logging.INFO)
+    egress = [e.strip() for e in args.egress.split(',') if e.strip()] if args.egress else None
+    seeds = engine.load_unique_inn_list(args.input, column=args.column).to_strings()
+    nodes = asyncio.run(crawl(seeds, args.depth, args.max_nodes, args.edges, egress, args.egress_rate))
+    print(f"Обойдено узлов: {nodes}, рёбра -> {args.edges}")
+
+
+def cmd_reparse(args):
+    # Повторный разбор сохранённых HTML-страниц (<ИНН>.html) без обращения к сайту
+    import pandas as pd
+
+    from companium import page
+    from companium.page import parse_company_page
+    from companium.store import open_store, put_cards
+
+    if args.profile_parse:
+        page.enable_profiling()
+    cards = []
+    for name in sorted(os.listdir(args.pages)):
+        if name.endswith('.html'):
+            with open(os.path.join(args.pages, name), encoding='utf-8') as f:
+                cards.append((name[:-5], parse_company_page(f.read())))
+    if args.store:
+        store = open_store(args.store)
+        put_cards(store, cards)
+        store.close()
+    if args.output:
+        pd.DataFrame([card for _, card in cards]).to_csv(args.output, index=False)
+    print(f"Разобрано страниц: {len(cards)}")
+    if page.profile is not None:
+        print(page.profile.report())
+
+
+def cmd_filter(args):
+    from filter.filter_passed_data import run
+
+    weights = None
+    if args.weights:
+        weights = {}
+        for item in args.weights.split(','):
+            column, _, weight = item.rpartition('=')
+            weights[column.strip()] = float(weight)
+    run(args.companium, args.main, args.output, args.store, weights, args.top_k, args.rules)
+
+
+def cmd_aggregate(args):
+    from companium.exposure import write_summary
+
+    exposure, rows = write_summary(args.inputs, args.output, args.level, args.min_total, args.top)
+    print(f"Производств: {exposure.rows} (без валидных ИНН: {exposure.skipped}), должников: {len(exposure.debtors)}, "
+          f"взыскателей: {len(exposure.creditors)}, пар: {len(exposure.pairs)}")
+    print(f"Сводка ({args.level}, {rows} строк) -> {args.output}")
+
+
+def cmd_inspect(args):
+    from filter.debug_inspect_boozy_rows import inspect_debtor_inn_column
+
+    inspect_debtor_inn_column(args.csv, args.column)
+
+
+def cmd_profile(args):
+    from filter.profile_dataset import run
+
+    def names(value):
+        return [c.strip() for c in value.split(',')] if value else None
+
+    try:
+        run(args.path, args.report, args.bad_rows, inn_columns=names(args.inn_columns),
+            date_columns=names(args.date_columns), columns=names(args.columns), check=names(args.check),
+            chunk_rows=args.chunk_rows)
+    except ValueError as e:
+        raise SystemExit(f"profile: {e}")
+
+
+def cmd_changes(args):
+    from companium.changes import read_changes
+
+    since = time.time() - args.days * 86400 if args.days else None
+    fields = args.field or None
+    for change in read_changes(args.path, fields, since):
+        print(json.dumps(change, ensure_ascii=False))
+
+
+def cmd_cache_stats(args):
+    # Без pandas и aiohttp: команда должна оставаться быстрой
+    from companium import jsonio
+    from companium.blockcache import BlockCache, is_block_cache
+    from companium.cardtable import CardTable, is_table
+
+    if not os.path.exists(args.cache):
+        print(f"Кэш {args.cache} не найден")
+        return 1
+    print(f"Файл: {args.cache} ({os.path.getsize(args.cache) / 1024 / 1024:.1f} МБ)")
+    if is_block_cache(args.cache):
+        with BlockCache(args.cache) as blocks:
+            print(f"Бинарный формат: блоков {len(blocks.blocks)}, сжатие {blocks.codec}, записи {blocks.records}")
+            cache = blocks.to_table()
+    else:
+        doc = jsonio.load(args.cache)
+        cache = CardTable.from_doc(doc) if is_table(doc) else doc
+    if isinstance(cache, CardTable):
+        shapes, strings, activities = cache.stats()
+        print(f"Таблицы: наборов ключей {shapes}, словарных строк {strings}, видов деятельности {activities}")
+    empty = sum(1 for card in cache.values() if not card)
+    print(f"Карточек: {len(cache)}, пустых: {empty}")
+    return 0
+
+
+def cmd_convert_cache(args):
+    # Формат результата — по расширению: *.bin — бинарный, иначе JSON-таблица
+    from companium import engine
+
+    started = time.perf_counter()
+    cache = engine.load_cache(args.source)
+    engine.save_cache(cache, args.target)
+    print(f"Карточек: {len(cache)}, {os.path.getsize(args.source) / 1024 / 1024:.1f} МБ -> "
+          f"{os.path.getsize(args.target) / 1024 / 1024:.1f} МБ ({args.target}), {time.perf_counter() - started:.1f} сек")
+
+
+def check_card(parser: argparse.ArgumentParser, args):
+    if not os.path.exists(args.cache):
+        parser.error(f"кэш {args.cache} не найден")
+
+
+def cmd_card(args):
+    from companium import jsonio
+    from companium.blockcache import BlockCache, is_block_cache
+    from companium.inn import canonical_inn
+
+    inn = canonical_inn(args.inn) or args.inn
+    if is_block_cache(args.cache):
+        # Распаковывается только блок с этим ИНН
+        with BlockCache(args.cache) as blocks:
+            card = blocks.get(inn)
+    else:
+        from companium import engine
+        card = engine.load_cache(args.cache).get(inn)
+    if card is None:
+        print(f"ИНН {inn} нет в кэше {args.cache}")
+        return 1
+    print(jsonio.dumps(card, indent=True).decode('utf-8'))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='companium', description='Скрапер и фильтры данных companium.ru')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('scrape', help='Скачать карточки компаний по списку ИНН из CSV')
+    p.add_argument('input')
+    p.add_argument('--column', default='debtor_inn')
+    p.add_argument('--output', default='data/parsed.csv')
+    p.add_argument('--store', default='companium.db', help='SQLite-хранилище карточек ("" — не писать)')
+    p.add_argument('--shards', type=int, default=1, help='Число процессов-шардов со своими сессиями')
+    p.add_argument('--fields', help='Только эти поля через запятую (потоковый разбор, без кэша), '
+                                    'например "ИНН,Короткое название,Статус,Дата последней отчетности"')
+    p.add_argument('--refresh', action='store_true', help='Перекачать карточки, даже если они есть в кэше')
+    p.add_argument('--changes', help='Писать изменения относительно кэша в JSONL (только с --refresh, без --fields)')
+    p.add_argument('--profile-parse', action='store_true', help='Время и ошибки по экстракторам карточки')
+    p.add_argument('--low-memory', action='store_true',
+                   help='Сжатый кэш в памяти, результаты на диск после --spill-after, отметки памяти в сводке')
+    p.add_argument('--spill-after', type=int, default=1000, help='Карточек в памяти до записи на диск')
+    p.add_argument('--watermark-every', type=int, default=1000, help='ИНН между отметками памяти (0 — только итоговая)')
+    p.add_argument('--egress', help='Каналы через запятую: http://host:port (прокси), IP-источник или direct')
+    p.add_argument('--egress-rate', type=float, help='Запросов в секунду на канал (по умолчанию 1)')
+    p.add_argument('--hedge', action='store_true', help='Дублировать запросы дольше p95 (не более 5%% запросов)')
+    p.add_argument('--fixed-timeout', action='store_true', help='Общий таймаут 10 сек вместо адаптивных')
+    p.add_argument('--fsync', choices=['group', 'interval', 'never'], default='group',
+                   help='fsync фоновой записи: после каждой группы, не чаще раза в секунду или никогда')
+    p.add_argument('--snapshot-every', type=float, default=60,
+                   help='Сек между полными снимками кэша (в промежутке — журнал новых карточек)')
+    p.set_defaults(func=cmd_scrape, validate=functools.partial(check_scrape, p))
+
+    p = sub.add_parser('enrich', help='Добавить к CSV поля карточек: из хранилища, недостающие — скачать')
+    p.add_argument('input')
+    p.add_argument('--column', default='debtor_inn')
+    p.add_argument('--output', default='data/enriched.csv')
+    p.add_argument('--store', default='companium.db')
+    p.add_argument('--fields', help='Поля карточки через запятую (по умолчанию название, статус, налоги, год отчётности)')
+    p.add_argument('--max-age', type=float, help='Перекачать карточки старше стольких дней')
+    p.add_argument('--no-fetch', action='store_true', help='Только хранилище, без запросов к сайту')
+    p.set_defaults(func=cmd_enrich)
+
+    p = sub.add_parser('enqueue', help='Поставить ИНН из CSV в общую таблицу заданий для узлов')
+    p.add_argument('input')
+    p.add_argument('--column', default='debtor_inn')
+    p.add_argument('--jobs', default='jobs.db', help='SQLite-файл заданий (на общем диске для нескольких машин)')
+    p.add_argument('--batch-size', type=int, default=50)
+    p.set_defaults(func=cmd_enqueue)
+
+    p = sub.add_parser('work', help='Узел: брать пачки ИНН из таблицы заданий, пока они не кончатся')
+    p.add_argument('--jobs', default='jobs.db')
+    p.add_argument('--store', default='companium.db', help='Общее хранилище карточек')
+    p.add_argument('--node', help='Имя узла (по умолчанию хост:pid)')
+    p.add_argument('--lease', type=float, default=300, help='Срок аренды пачки, сек')
+    p.add_argument('--egress', help='Каналы через запятую: http://host:port (прокси), IP-источник или direct')
+    p.add_argument('--egress-rate', type=float, help='Запросов в секунду на канал (по умолчанию 1)')
+    p.set_defaults(func=cmd_work)
+
+    p = sub.add_parser('jobs', help='Состояние таблицы заданий и активные узлы')
+    p.add_argument('--jobs', default='jobs.db')
+    p.set_defaults(func=cmd_jobs)
+
+    p = sub.add_parser('crawl', help='Обойти связанные компании (директор, учредители, управляющая компания)')
+    p.add_argument('input')
+    p.add_argument('--column', default='debtor_inn')
+    p.add_argument('--depth', type=int, default=2)
+    p.add_argument('--max-nodes', type=int, default=50000, help='Предел числа компаний в обходе')
+    p.add_argument('--edges', default='edges.csv')
+    p.add_argument('--egress', help='Каналы через запятую: http://host:port (прокси), IP-источник или direct')
+    p.add_argument('--egress-rate', type=float, help='Запросов в секунду на канал (по умолчанию 1)')
+    p.set_defaults(func=cmd_crawl)
+
+    p = sub.add_parser('reparse', help='Разобрать сохранённые HTML-страницы компаний')
+    p.add_argument('pages', help='Каталог с файлами <ИНН>.html')
+    p.add_argument('--output')
+    p.add_argument('--store')
+    p.add_argument('--profile-parse', action='store_true', help='Время и ошибки по экстракторам карточки')
+    p.set_defaults(func=cmd_reparse)
+
+    p = sub.add_parser('filter', help='Отфильтровать и обогатить таблицу должников')
+    p.add_argument('--companium', default='data/res250714_300_dropped_cols.csv')
+    p.add_argument('--main', default='data/cleaned___debt_creditors_add0.csv')
+    p.add_argument('--output', default='data/res250714_400_filtered.csv')
+    p.add_argument('--store', help='Брать данные компаний из SQLite-хранилища')
+    p.add_argument('--weights', help='Веса колонок для сортировки по заполненности, '
+                                     'например "Название должника=3,Телефоны=2" (по умолчанию все колонки с весом 1)')
+    p.add_argument('--top-k', type=int, help='Оставить только K самых заполненных строк')
+    p.add_argument('--rules', help='JSON с правилами фильтрации (статус, давность ликвидации и отчетности, '
+                                   'обязательные колонки); по умолчанию filter/filter_rules.json')
+    p.set_defaults(func=cmd_filter)
+
+    p = sub.add_parser('aggregate', help='Суммы задолженности по должникам, взыскателям и парам')
+    p.add_argument('inputs', nargs='+', help='CSV с колонками summa, creditor_inn, debtor_inn')
+    p.add_argument('--output', default='data/debt_exposure.csv')
+    p.add_argument('--level', choices=['pair', 'debtor', 'creditor'], default='pair')
+    p.add_argument('--min-total', type=float, default=0, help='Только строки с суммой не меньше')
+    p.add_argument('--top', type=int, help='Только N строк с наибольшей суммой')
+    p.set_defaults(func=cmd_aggregate)
+
+    p = sub.add_parser('inspect', help='Диагностика колонки ИНН в CSV')
+    p.add_argument('csv')
+    p.add_argument('--column', default='debtor_inn')
+    p.set_defaults(func=cmd_inspect)
+
+    p = sub.add_parser('profile', help='Профиль CSV/Parquet за один проход: пустые значения, кардинальность, '
+                                       'длины и контрольные суммы ИНН, диапазоны дат')
+    p.add_argument('path')
+    p.add_argument('--report', help='Сохранить отчёт в JSON')
+    p.add_argument('--bad-rows', help='CSV для строк с проблемами в проверяемых колонках')
+    p.add_argument('--columns', help='Только эти колонки через запятую')
+    p.add_argument('--inn-columns', help='Колонки ИНН (по умолчанию — по имени: inn, *_inn, ИНН...)')
+    p.add_argument('--date-columns', help='Колонки дат (по умолчанию — по имени: date, дата)')
+    p.add_argument('--check', help='Колонки, проблемы в которых попадают в --bad-rows (по умолчанию ИНН и даты)')
+    p.add_argument('--chunk-rows', type=int, default=200_000)
+    p.set_defaults(func=cmd_profile)
+
+    p = sub.add_parser('changes', help='Показать изменения карточек из ленты')
+    p.add_argument('path', nargs='?', default='changes.jsonl')
+    p.add_argument('--field', action='append', help='Только это поле (можно несколько раз)')
+    p.add_argument('--days', type=float, help='Только за последние N дней')
+    p.set_defaults(func=cmd_changes)
+
+    p = sub.add_parser('cache-stats', help='Статистика по inn_cache.json')
+    p.add_argument('--cache', default='inn_cache.json')
+    p.set_defaults(func=cmd_cache_stats)
+
+    p = sub.add_parser('convert-cache', help='Перевести кэш карточек в другой формат (*.bin — бинарный с индексом)')
+    p.add_argument('source', nargs='?', default='inn_cache.json')
+    p.add_argument('target', nargs='?', default='inn_cache.bin')
+    p.set_defaults(func=cmd_convert_cache)
+
+    p = sub.add_parser('card', help='Показать карточку из кэша по ИНН')
+    p.add_argument('inn')
+    p.add_argument('--cache', default='inn_cache.json')
+    p.set_defaults(func=cmd_card, validate=functools.partial(check_card, p))
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'validate', None) is not None:
+        args.validate(args)
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
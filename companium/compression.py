@@ -0,0 +1,97 @@
+"""
+Сжатие при передаче: какие кодировки мы умеем принимать и как их распаковывать.
+
+Сессия работает с auto_decompress=False, тело распаковывается здесь — так мы видим
+и размер на проводе, и размер после распаковки. brotli и zstd — опциональные зависимости:
+если их нет, они просто не попадают в accept-encoding.
+"""
+import zlib
+from typing import Callable, Optional
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+
+if zstd is None:
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+else:
+    zstandard = None
+
+
+def supported_encodings() -> list:
+    encodings = []
+    if zstd is not None or zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings += ['gzip', 'deflate']
+    return encodings
+
+
+def accept_encoding() -> str:
+    return ', '.join(supported_encodings())
+
+
+def decompressor(encoding: Optional[str]) -> Callable[[bytes], bytes]:
+    """Инкрементальный распаковщик: функция chunk -> распакованные байты."""
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('', 'identity'):
+        return lambda chunk: chunk
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+    if encoding == 'deflate':
+        return zlib.decompressobj().decompress
+    if encoding == 'br' and brotli is not None:
+        return brotli.Decompressor().process
+    if encoding == 'zstd':
+        if zstd is not None:
+            return zstd.ZstdDecompressor().decompress
+        if zstandard is not None:
+            return zstandard.ZstdDecompressor().decompressobj().decompress
+    raise ValueError(f"Неподдерживаемая кодировка ответа: {encoding}")
+
+
+def decode_body(raw: bytes, encoding: Optional[str]) -> bytes:
+    return decompressor(encoding)(raw)
+
+
+def block_codec() -> str:
+    """Кодек для сжатия блоков на диске: zstd, если установлен, иначе zlib."""
+    return 'zstd' if zstd is not None or zstandard is not None else 'zlib'
+
+
+def compress_block(data: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    if codec == 'zlib':
+        return zlib.compress(data, 6 if level is None else level)
+    if codec == 'zstd':
+        if zstd is not None:
+            return zstd.compress(data, 3 if level is None else level)
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    raise ValueError(f"Кодек {codec} недоступен")
+
+
+def decompress_block(data: bytes, codec: str) -> bytes:
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        if zstd is not None:
+            return zstd.decompress(data)
+        if zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Кодек {codec} недоступен: установите backports.zstd или zstandard")
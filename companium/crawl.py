@@ -0,0 +1,155 @@
+"""
+Обход связанных компаний: от карточек должников по ссылкам на генерального директора,
+учредителей и управляющую компанию, в ширину до заданной глубины.
+
+Страницы компаний скачиваются через тот же движок (задержки, очередь повторов, лимит
+одновременных запросов), уже известные карточки берутся из кэша. Ссылки на физлиц
+(/people/...) попадают в список рёбер как листья — их страницы мы не разбираем.
+Посещённые узлы хранятся как 64-битные хэши, а не строки URL.
+"""
+import asyncio
+import csv
+import logging
+import os
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from companium import engine, jsonio
+from companium.inn import canonical_inn
+from companium.retry import RetryQueue
+
+logger = logging.getLogger(__name__)
+
+EDGES_FILE = "edges.csv"
+LINK_INDEX_FILE = "link_index.json"  # ссылка на карточку -> ИНН, чтобы повторные обходы брали кэш
+MAX_NODES = 50000
+EDGE_COLUMNS = ['depth', 'source_inn', 'relation', 'target_url', 'target_name', 'target_inn']
+
+
+class SeenSet:
+    """Множество посещённых узлов на 64-битных хэшах ключей."""
+
+    def __init__(self):
+        self._hashes = set()
+
+    def add(self, key: str) -> bool:
+        """Добавляет ключ; False, если он уже встречался."""
+        h = int.from_bytes(blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+        if h in self._hashes:
+            return False
+        self._hashes.add(h)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+def card_links(card: Dict[str, Any]) -> List[Tuple[str, str, Optional[str], Optional[str]]]:
+    """Связи карточки: (тип связи, ссылка, имя, ИНН если известен)."""
+    links = []
+    ceo = card.get('Генеральный директор')
+    if isinstance(ceo, dict) and ceo.get('Ссылка'):
+        links.append(('ceo', ceo['Ссылка'], ceo.get('Имя'), ceo.get('ИНН')))
+    founder = card.get('Учредители')
+    if isinstance(founder, dict) and founder.get('Ссылка'):
+        links.append(('founder', founder['Ссылка'], founder.get('Имя'), None))
+    manager = card.get('Управляющая компания')
+    if isinstance(manager, dict) and manager.get('link'):
+        links.append(('managing_company', manager['link'], manager.get('name'), None))
+    return links
+
+
+def is_company_link(link: str) -> bool:
+    return not link.startswith('/people/')
+
+
+def load_link_index(path: str = LINK_INDEX_FILE) -> Dict[str, str]:
+    if os.path.exists(path):
+        return jsonio.load(path)
+    return {}
+
+
+def save_link_index(index: Dict[str, str], path: str = LINK_INDEX_FILE):
+    jsonio.dump(index, path)
+
+
+async def fetch_level(session, links: Sequence[str], cache: Dict[str, Any],
+                      link_index: Dict[str, str]) -> List[Tuple[str, Dict[str, Any]]]:
+    found = []
+    todo = []
+    for link in links:
+        inn = link_index.get(link)
+        if inn and inn in cache:
+            found.append((inn, cache[inn]))
+        else:
+            todo.append(link)
+
+    queue = RetryQueue(todo, engine.MAX_RETRIES)
+
+    async def worker():
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            link, attempt = job
+            try:
+                url = link if link.startswith('http') else f"{engine.DETAILS_URL}{link}"
+                card = await engine.request_company_details(session, url)
+            except engine.FetchError as e:
+                if queue.retry(link, attempt, e.reason, e.retry_base) is None:
+                    logger.error(f"Не удалось скачать {link}: {', '.join(queue.failures[link])}")
+                continue
+            queue.done(link)
+            inn = canonical_inn(card.get('ИНН')) if card else None
+            if inn:
+                cache[inn] = card
+                link_index[link] = inn
+                found.append((inn, card))
+
+    await asyncio.gather(*(worker() for _ in range(engine.CONCURRENT_REQUESTS)))
+    return found
+
+
+async def crawl(seed_inns: Sequence[str], depth: int = 2, max_nodes: int = MAX_NODES,
+                edges_path: str = EDGES_FILE, egress: Optional[Sequence[str]] = None,
+                egress_rate: Optional[float] = None) -> int:
+    """
+    Обходит окрестность seed_inns до глубины depth, пишет рёбра в CSV. Возвращает число компаний.
+    max_nodes ограничивает число компаний (исходные и поставленные в обход ссылки, физлица не в счёт);
+    egress, egress_rate — каналы и их скорость, как у engine.process_inn_list.
+    """
+    cache = await asyncio.to_thread(engine.load_cache)
+    link_index = await asyncio.to_thread(load_link_index)
+    seen = SeenSet()  # ссылки и ИНН уже встреченных узлов
+    session = await engine.open_session(egress, egress_rate)
+    try:
+        missing = [inn for inn in seed_inns if inn not in cache]
+        if missing:
+            await engine.run_inn_queue(session, missing, cache)
+        current = [(inn, cache[inn]) for inn in seed_inns if inn in cache and seen.add(f"inn:{inn}")]
+        companies = len(current)
+
+        with open(edges_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(EDGE_COLUMNS)
+            for level in range(depth + 1):
+                frontier = []
+                for inn, card in current:
+                    for relation, link, name, target_inn in card_links(card):
+                        writer.writerow([level, inn, relation, link, name, target_inn])
+                        if (level < depth and is_company_link(link) and companies + len(frontier) < max_nodes
+                                and seen.add(link)):
+                            frontier.append(link)
+                logger.info(f"Уровень {level}: узлов {len(current)}, новых ссылок {len(frontier)}, всего {companies}")
+                if not frontier:
+                    break
+                fetched = await fetch_level(session, frontier, cache, link_index)
+                # Компания могла встретиться под другой ссылкой или среди исходных ИНН
+                current = [(inn, card) for inn, card in fetched if seen.add(f"inn:{inn}")]
+                companies += len(current)
+                # Между уровнями кэш никто не меняет: пишем его в потоке, не останавливая цикл событий
+                await asyncio.to_thread(engine.save_cache, cache)
+                await asyncio.to_thread(save_link_index, link_index)
+    finally:
+        await session.close()
+    return companies
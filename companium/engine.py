@@ -0,0 +1,528 @@
+"""
+Асинхронный движок скрапера: сессия, запросы с повторами, кэш и обработка списка ИНН.
+
+Используется и асинхронным скриптом (acync_parser.py), и блокирующим фасадом (parser.py).
+"""
+import aiohttp
+import asyncio
+import gc
+import random
+from typing import List, Dict, Optional, Any, Sequence, Callable, Tuple, Union, Awaitable
+import pandas as pd
+import os
+import logging
+import sqlite3
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from companium.blockcache import SUFFIX as BLOCK_SUFFIX, BlockCache, is_block_cache, write_block_cache
+from companium.cardtable import CardTable, is_table
+from companium.changes import ChangeFeed
+from companium.compression import accept_encoding, decode_body
+from companium.egress import EgressPool
+from companium.inn import InnArray, canonical_inn
+from companium.latency import LatencyStats
+from companium.memory import CompactCache, MemoryWatch, SpilledResults, SPILL_AFTER, WATERMARK_EVERY
+from companium import jsonio, page
+from companium.page import extract_link, parse_company_page
+from companium.retry import BACKOFF_BASE, BACKOFF_BASE_429, RetryQueue, backoff_delay
+from companium.store import put_cards
+from companium.streaming import can_stream, stream_fields
+from companium.writer import BackgroundWriter, JournaledCache, journal_path, queued_logging, replay_journal
+
+logger = logging.getLogger(__name__)
+
+# Счётчики текущего процесса (429, ошибки и т.п.) для итоговой сводки прогона
+RUN_STATS = Counter()
+
+# Конфигурация
+BASE_URL = "https://companium.ru/search/tips?query="
+DETAILS_URL = "https://companium.ru"
+DELAY_RANGE = (1, 3)  # Случайная задержка между запросами
+MAX_RETRIES = 3  # Максимальное количество попыток на ИНН
+TIMEOUT = aiohttp.ClientTimeout(total=10)  # Таймаут запроса, пока не набрана статистика задержек
+ADAPTIVE_TIMEOUTS = True  # Таймауты по перцентилям задержек каждого эндпоинта
+HEDGE = False  # Дублировать запрос, если он дольше p95 (в пределах бюджета latency.HEDGE_BUDGET)
+LATENCY = LatencyStats(TIMEOUT)  # Задержки по эндпоинтам для адаптивных таймаутов и хеджирования
+CONCURRENT_REQUESTS = 5  # Количество одновременных запросов
+CACHE_FILE = "inn_cache.json"
+SNAPSHOT_EVERY = 60.0  # сек между полными снимками кэша; в промежутке новые карточки дописываются в журнал
+FSYNC = 'group'  # политика fsync фоновой записи: 'group', 'interval' или 'never' (см. companium.writer)
+FAILURES_FILE = "failed_inns.json"  # ИНН, исчерпавшие попытки, с причинами
+EGRESS: List[str] = []  # прокси / адреса-источники для пула каналов; пусто — одна прямая сессия
+EGRESS_RATE = 1.0  # запросов в секунду на канал пула
+COOKIES = {
+    '_ym_uid': '1747066760757332821',
+    '_ym_isad': '2',
+    '_companium_ru_session': 'xc%2F4BDXj6uc62w%2FzDNZNeG%2B1JkJYcD4Mt15Napzw5xdZ9RS1ZRMqAm4G1UZgkAdjvp5Fy0cTtKtcCiqCqN19BZpoDgc0lHye4dFAzjJLd9DEr5lYEpCvI4tJElzX5DrQHb8vwWoffDZxkAflbHJuaxeJ%2BLeKW%2FJ%2B6Y%2Fxw9AEwlIyS7nWRVyAHo%2FCSRDyvBUYvyPZaK%2B3R5RHYvCJbyRowR%2FMXbO6YUh%2F8lZeKVZdPCfO37FhjYc1SeC7tb0N40s9DggseZ3cBFcyDS79kgnT5CeGXTn7k9i88ZSs6%2BM%3D--rDEsdVTSYE%2FkEQVa--N8LadXM8e7WFcRFXlln98g%3D%3D',
+    '_ym_d': '1747591126'
+}
+HEADERS = {
+    'authority': 'companium.ru',
+    'accept': '*/*',
+    'accept-encoding': accept_encoding(),
+    'accept-language': 'ru,en;q=0.9,en-GB;q=0.8,en-US;q=0.7',
+    'referer': 'https://companium.ru/',
+    'sec-ch-ua': '"Chromium";v="136", "Microsoft Edge";v="136", "Not.A/Brand";v="99"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36 Edg/136.0.0.0'
+}
+
+
+def load_unique_inn_list(filepath: str, column: str = 'debtor_inn') -> InnArray:
+    df = pd.read_csv(filepath, dtype={column: str}, usecols=[column])  # Убедимся, что ИНН читается как строка
+    return InnArray.from_series(df[column]).unique()
+
+
+def load_full_inn_list(filepath: str, column: str = 'debtor_inn') -> InnArray:
+    df = pd.read_csv(filepath, dtype={column: str}, usecols=[column])  # Убедимся, что ИНН читается как строка
+    return InnArray.from_series(df[column])
+
+
+async def create_session(cookies: Optional[Dict[str, str]] = None,
+                         headers: Optional[Dict[str, str]] = None,
+                         connector: Optional[aiohttp.BaseConnector] = None) -> aiohttp.ClientSession:
+    # Распаковываем сами (read_body), чтобы считать байты на проводе и после распаковки
+    return aiohttp.ClientSession(headers=headers or HEADERS, cookies=COOKIES if cookies is None else cookies,
+                                 timeout=TIMEOUT, auto_decompress=False, connector=connector,
+                                 trace_configs=[LATENCY.trace_config()])
+
+
+async def open_session(egress: Optional[Sequence[str]] = None, rate: Optional[float] = None):
+    """Обычная сессия или, если заданы каналы (egress или EGRESS), пул с тем же интерфейсом get()."""
+    egress = EGRESS if egress is None else egress
+    if not egress:
+        return await create_session()
+    pool = EgressPool(egress, rate or EGRESS_RATE)
+    await pool.open(create_session)
+    return pool
+
+
+async def read_body(response: aiohttp.ClientResponse) -> bytes:
+    raw = await response.read()
+    body = decode_body(raw, response.headers.get('Content-Encoding'))
+    RUN_STATS['bytes_wire'] += len(raw)
+    RUN_STATS['bytes_decoded'] += len(body)
+    RUN_STATS['responses'] += 1
+    return body
+
+
+def run_summary() -> str:
+    wire, decoded = RUN_STATS['bytes_wire'], RUN_STATS['bytes_decoded']
+    ratio = f"{decoded / wire:.1f}x" if wire else "-"
+    return (f"ответов: {RUN_STATS['responses']}, получено {wire / 1024 / 1024:.1f} МБ "
+            f"(после распаковки {decoded / 1024 / 1024:.1f} МБ, сжатие {ratio}), "
+            f"429: {RUN_STATS['http_429']}, ошибок: {RUN_STATS['errors']}, "
+            f"повторов: {RUN_STATS['retries']}, не обработано ИНН: {RUN_STATS['failed']}"
+            + (f", дублей: {RUN_STATS['hedged']} (быстрее первого: {RUN_STATS['hedge_wins']})"
+               if RUN_STATS['hedged'] else ""))
+
+
+async def random_delay():
+    await asyncio.sleep(random.uniform(*DELAY_RANGE))
+
+
+class FetchError(Exception):
+    """Неудачная попытка запроса, которую имеет смысл повторить (429, сеть, таймаут, 5xx)."""
+
+    def __init__(self, reason: str, retry_base: float = BACKOFF_BASE):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_base = retry_base
+
+
+def _check_status(response: aiohttp.ClientResponse):
+    if response.status == 429:
+        RUN_STATS['http_429'] += 1
+        raise FetchError('http_429', BACKOFF_BASE_429)
+    if response.status != 200:
+        raise FetchError(f"http_{response.status}")
+
+
+@asynccontextmanager
+async def _timed_get(session, url: str, endpoint: str):
+    """session.get с таймаутом эндпоинта; успешные ответы и таймауты пополняют статистику задержек."""
+    timeout = LATENCY.timeout(endpoint) if ADAPTIVE_TIMEOUTS else TIMEOUT
+    ctx = SimpleNamespace(sent=time.monotonic())  # sent обновит трассировка сессии
+    try:
+        async with session.get(url, timeout=timeout, trace_request_ctx=ctx) as response:
+            first_byte = time.monotonic() - ctx.sent
+            yield response
+            if response.status == 200:
+                LATENCY.observe(endpoint, first_byte, time.monotonic() - ctx.sent)
+    except asyncio.TimeoutError:
+        LATENCY.observe_timeout(endpoint, timeout)
+        raise
+
+
+async def _hedged(endpoint: str, attempt: Callable):
+    """
+    attempt() — одна попытка запроса. В режиме HEDGE, если она дольше p95 эндпоинта,
+    параллельно отправляется дубль (он тоже проходит через ограничители пула каналов);
+    берётся первый успешный ответ, второй запрос отменяется.
+    """
+    delay = LATENCY.hedge_delay(endpoint) if HEDGE else None
+    if delay is None:
+        return await attempt()
+    first = asyncio.ensure_future(attempt())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+    LATENCY.hedges += 1
+    RUN_STATS['hedged'] += 1
+    second = asyncio.ensure_future(attempt())
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        RUN_STATS['hedge_wins'] += 1
+                    return task.result()
+        return first.result()  # обе попытки неудачны — ошибка первой
+    finally:
+        for task in (first, second):
+            if not task.done():
+                task.cancel()
+
+
+async def request_company_link(session: aiohttp.ClientSession, inn: str) -> Optional[str]:
+    """Одна попытка получить ссылку на карточку; FetchError — если попытку надо повторить."""
+    await random_delay()
+
+    async def attempt():
+        try:
+            async with _timed_get(session, f"{BASE_URL}{inn}", 'tips') as response:
+                _check_status(response)
+                data = jsonio.loads(await read_body(response))
+                if data and isinstance(data, list):
+                    result = data[0]
+                    link = extract_link(result.get('content', ''))
+                    return f"{DETAILS_URL}{link}" if link else None
+                return None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            RUN_STATS['errors'] += 1
+            raise FetchError(type(e).__name__) from e
+
+    return await _hedged('tips', attempt)
+
+
+async def request_company_details(session: aiohttp.ClientSession, url: str,
+                                  fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """Одна попытка скачать и разобрать карточку; fields — только эти поля, потоковым разбором."""
+    await random_delay()
+    stream = bool(fields) and can_stream(fields)
+    endpoint = 'stream' if stream else 'details'
+
+    async def attempt():
+        try:
+            async with _timed_get(session, url, endpoint) as response:
+                _check_status(response)
+                if stream:
+                    return await stream_fields(response, fields, RUN_STATS)
+                html = (await read_body(response)).decode(response.charset or 'utf-8', errors='replace')
+            # Разбор вне замера: таймауты относятся к сети, а не к парсеру
+            return parse_company_page(html)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            RUN_STATS['errors'] += 1
+            raise FetchError(type(e).__name__) from e
+
+    return await _hedged(endpoint, attempt)
+
+
+async def _with_retries(request, *args):
+    # Для одиночных вызовов вне очереди: повторяем на месте с той же политикой задержек
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await request(*args)
+        except FetchError as e:
+            logger.error(f"Ошибка {e.reason} для {args[1]} (попытка {attempt + 1})")
+            if attempt + 1 < MAX_RETRIES:
+                await asyncio.sleep(backoff_delay(attempt, e.retry_base))
+    return None
+
+
+async def fetch_company_link(session: aiohttp.ClientSession, inn: str) -> Optional[str]:
+    return await _with_retries(request_company_link, session, inn)
+
+
+async def fetch_company_details(session: aiohttp.ClientSession, url: str,
+                                fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    return await _with_retries(request_company_details, session, url, fields)
+
+
+async def process_single_inn(session: aiohttp.ClientSession, inn: str, cache: Dict[str, Any],
+                             fields: Optional[Sequence[str]] = None,
+                             links: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Одна попытка по ИНН. Бросает FetchError, если попытку надо повторить;
+    найденная ссылка запоминается в links, чтобы повтор не запрашивал её заново.
+    """
+    if inn in cache:
+        logger.info(f"[КЭШ] Используется сохранённый результат для ИНН: {inn}")
+        return {f: cache[inn].get(f) for f in fields} if fields else cache[inn]
+
+    link = links.get(inn) if links is not None else None
+    if link is None:
+        link = await request_company_link(session, inn)
+        if not link:
+            logger.warning(f"Не удалось получить ссылку для ИНН: {inn}")
+            return None
+        logger.info(f"Найдена ссылка: {link}")
+        if links is not None:
+            links[inn] = link
+
+    company_data = await request_company_details(session, link, fields)
+    if company_data:
+        if not fields:
+            # Частичные карточки в кэш не кладём, иначе полный прогон их не перекачает
+            cache[inn] = company_data
+        return company_data
+    return None
+
+
+async def run_inn_queue(session: aiohttp.ClientSession, inn_list: Sequence[str], cache: Dict[str, Any],
+                        fields: Optional[Sequence[str]] = None,
+                        on_result: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+                        keep_results: bool = True,
+                        throttle: Optional[Callable[[], Awaitable[None]]] = None
+                        ) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+    """
+    Обрабатывает ИНН CONCURRENT_REQUESTS воркерами через очередь с отложенными повторами.
+    Возвращает ({ИНН: карточка}, {ИНН: причины неудач для исчерпавших попытки}).
+    keep_results=False — карточки только передаются в on_result, словарь результатов пуст;
+    throttle — корутина, которую воркер ждёт после on_result (например, место в очереди записи).
+    """
+    queue = RetryQueue(inn_list, MAX_RETRIES)
+    links: Dict[str, str] = {}
+    results: Dict[str, Any] = {}
+
+    async def worker():
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            inn, attempt = job
+            try:
+                card = await process_single_inn(session, inn, cache, fields, links)
+            except FetchError as e:
+                delay = queue.retry(inn, attempt, e.reason, e.retry_base)
+                if delay is None:
+                    logger.error(f"ИНН {inn}: попытки исчерпаны ({', '.join(queue.failures[inn])})")
+                else:
+                    RUN_STATS['retries'] += 1
+                    logger.warning(f"Ошибка {e.reason} для ИНН {inn}, повтор через {delay:.1f} сек")
+                continue
+            queue.done(inn)
+            if keep_results:
+                results[inn] = card
+            if on_result is not None:
+                on_result(inn, card)
+            if throttle is not None:
+                await throttle()
+
+    await asyncio.gather(*(worker() for _ in range(CONCURRENT_REQUESTS)))
+    RUN_STATS['failed'] += len(queue.exhausted)
+    return results, queue.exhausted
+
+
+async def process_inn_batch(inn_batch: Sequence[str], cache: Dict[str, Any],
+                            cookies: Optional[Dict[str, str]] = None,
+                            headers: Optional[Dict[str, str]] = None,
+                            fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    session = await create_session(cookies, headers)
+    try:
+        results, _ = await run_inn_queue(session, inn_batch, cache, fields)
+        return [results.get(inn) for inn in inn_batch]
+    finally:
+        await session.close()
+
+
+def load_cache(path: str = CACHE_FILE) -> CardTable:
+    """
+    Кэш карточек: бинарный (*.bin) или JSON-таблица; файл старого формата (обычный
+    JSON-словарь) переводится в таблицу при загрузке. Поверх снимка проигрывается журнал
+    карточек, записанных после него (прогон, прерванный до следующего снимка).
+    """
+    if not os.path.exists(path):
+        table = CardTable()
+    elif is_block_cache(path):
+        with BlockCache(path) as blocks:
+            table = blocks.to_table()
+    else:
+        doc = jsonio.load(path)
+        if is_table(doc):
+            table = CardTable.from_doc(doc)
+        else:
+            # Ключи старых кэшей могли потерять ведущий ноль — приводим к канону
+            table = CardTable((canonical_inn(inn) or inn, card) for inn, card in doc.items())
+    replayed = replay_journal(table, journal_path(path))
+    if replayed:
+        logger.info(f"Из журнала кэша восстановлено карточек: {replayed}")
+    return table
+
+
+def save_cache(cache: Dict[str, Any], path: str = CACHE_FILE):
+    """Пишет во временный файл и подменяет path: прерванная запись не портит прежний кэш."""
+    if path.endswith(BLOCK_SUFFIX):
+        write_block_cache(cache, path)
+        return
+    tmp = f"{path}.tmp"
+    if isinstance(cache, CardTable):
+        cache.dump(tmp)
+    elif isinstance(cache, CompactCache):
+        with open(tmp, "w", encoding="utf-8") as f:
+            cache.dump(f)
+    else:
+        jsonio.dump(cache, tmp, indent=True)
+    os.replace(tmp, path)
+
+
+def save_failures(failures: Dict[str, List[str]], path: str = FAILURES_FILE):
+    jsonio.dump({inn: {'attempts': len(reasons), 'reasons': reasons} for inn, reasons in failures.items()},
+                path, indent=True)
+
+
+async def process_inn_list(inn_list: Sequence[str], store: Optional[sqlite3.Connection] = None,
+                           fields: Optional[Sequence[str]] = None, refresh: bool = False,
+                           changes: Optional[ChangeFeed] = None, low_memory: bool = False,
+                           spill_after: int = SPILL_AFTER, watermark_every: int = WATERMARK_EVERY,
+                           egress: Optional[Sequence[str]] = None, egress_rate: Optional[float] = None,
+                           spill_path: Optional[str] = None) -> Union[List[Dict[str, Any]], SpilledResults]:
+    """
+    refresh — перекачать карточки даже при наличии в кэше;
+    changes — лента изменений: свежие карточки сравниваются с закэшированными при записи
+    (только с refresh и без fields — иначе кэшированные карточки не перекачиваются);
+    low_memory — кэш в сжатом виде, результаты после spill_after карточек уходят на диск
+    (возвращается SpilledResults в порядке завершения, а не исходного списка),
+    в файл spill_path (по умолчанию — уникальный results_spill.*.jsonl в текущем каталоге);
+    в сводке — отметки памяти каждые watermark_every ИНН (0 — только в конце);
+    egress — каналы пула (по умолчанию EGRESS), egress_rate — запросов в секунду на канал.
+
+    Вся запись на диск (журнал и снимки кэша, хранилище, лента изменений, выгрузка
+    результатов, логи) идёт через фоновый поток, цикл событий на ней не блокируется.
+    """
+    with queued_logging():
+        writer = BackgroundWriter(fsync=FSYNC)
+        try:
+            return await _process_inn_list(writer, inn_list, store, fields, refresh, changes, low_memory,
+                                           spill_after, watermark_every, egress, egress_rate, spill_path)
+        finally:
+            writer.close()
+            gc.unfreeze()
+            logger.info(f"Фоновая запись: {writer.summary()}")
+
+
+async def _process_inn_list(writer: BackgroundWriter, inn_list: Sequence[str], store: Optional[sqlite3.Connection],
+                            fields: Optional[Sequence[str]], refresh: bool, changes: Optional[ChangeFeed],
+                            low_memory: bool, spill_after: int, watermark_every: int,
+                            egress: Optional[Sequence[str]], egress_rate: Optional[float],
+                            spill_path: Optional[str]) -> Union[List[Dict[str, Any]], SpilledResults]:
+    if changes is not None and (not refresh or fields):
+        raise ValueError("Лента изменений пишется только при refresh=True и без fields")
+    journal = journal_path(CACHE_FILE)
+    # Непустой журнал — прошлый прогон прервался: восстановленное из него войдёт в первый же снимок
+    recovered = os.path.exists(journal) and os.path.getsize(journal) > 0
+    cache = await asyncio.to_thread(load_cache, CACHE_FILE)
+    # Кэш живёт весь прогон: убираем его из обхода сборщика циклов, иначе первая же
+    # полная сборка посреди прогона обходит все карточки и стопорит цикл событий
+    gc.freeze()
+    watch = None
+    if low_memory:
+        cache = CompactCache(cache)
+        watch = MemoryWatch(watermark_every)
+        spilled = SpilledResults(spill_path, spill_after=spill_after, writer=writer)
+    journaled = JournaledCache(cache, writer, journal)
+    # В режиме refresh воркеры не видят кэш, а свежие карточки вливаются в него здесь
+    work_cache = ({} if not low_memory else CompactCache()) if refresh else journaled
+    pending = []
+    done = 0
+    snapshot_at = time.monotonic()
+    snapshot_written = -1 if recovered else 0
+
+    def snapshot():
+        # Копия кэша пишется в фоне; журнал обрезается следом, в том же порядке заданий
+        nonlocal snapshot_at, snapshot_written
+        if journaled.written > snapshot_written:
+            writer.call(save_cache, cache.copy(), CACHE_FILE, sync=CACHE_FILE)
+            writer.truncate(journal)
+            snapshot_written = journaled.written
+        snapshot_at = time.monotonic()
+
+    def write_store():
+        nonlocal pending
+        if store is not None and pending:
+            writer.call(put_cards, store, pending, keep_card=not fields)
+        pending = []
+
+    def on_result(inn: str, card: Optional[Dict[str, Any]]):
+        nonlocal done
+        done += 1
+        if watch is not None:
+            watch.sample(done)
+        if card is not None:
+            if low_memory:
+                spilled.append(card)
+            pending.append((inn, card))
+            if refresh and not fields:
+                if changes is not None:
+                    writer.call(changes.record, inn, cache.get(inn), card)
+                journaled[inn] = card
+        if done % CONCURRENT_REQUESTS == 0 or done == len(inn_list):
+            logger.info(f"Обработано ИНН {done}/{len(inn_list)}")
+            write_store()
+            if time.monotonic() - snapshot_at >= SNAPSHOT_EVERY:
+                snapshot()
+
+    session = await open_session(egress, egress_rate)
+    try:
+        results, failures = await run_inn_queue(session, inn_list, work_cache, fields, on_result,
+                                                keep_results=not low_memory, throttle=writer.room)
+    finally:
+        await session.close()
+        if isinstance(session, EgressPool):
+            logger.info(f"Каналы:\n{session.report()}")
+        write_store()
+        snapshot()
+        await asyncio.to_thread(spilled.close if low_memory else writer.flush)
+    if os.path.exists(journal) and not os.path.getsize(journal):
+        os.remove(journal)
+
+    if failures:
+        save_failures(failures)
+        logger.warning(f"Не удалось обработать {len(failures)} ИНН, причины в {FAILURES_FILE}")
+
+    if changes is not None:
+        logger.info(f"Изменилось карточек: {changes.changed_cards}, лента: {changes.path}")
+    logger.info(f"Сводка прогона: {run_summary()}")
+    logger.info(f"Задержки:\n{LATENCY.summary()}")
+    if page.profile is not None:
+        logger.info(f"Профиль разбора страниц:\n{page.profile.report()}")
+    if watch is not None:
+        watch.sample(done, force=True)
+        watch.stop()
+        logger.info(f"Память: {watch.summary()}")
+        return spilled
+    return [results[inn] for inn in inn_list if results.get(inn) is not None]
+
+
+def save_results_to_json(results: List[Dict[str, Any]], filename: str = 'companium_data.json'):
+    jsonio.dump(results, filename, indent=True)
+    logger.info(f"Результаты сохранены в {filename}")
+
+
+def save_results_to_csv(data: List[Dict[str, Any]], filename: str, chunk_size: int = 5000):
+    if isinstance(data, SpilledResults):
+        # Пишем частями с общим набором колонок, не собирая всю таблицу в памяти
+        columns = list(data.columns)
+        for i, chunk in enumerate(data.chunks(chunk_size)):
+            pd.DataFrame(chunk, columns=columns).to_csv(filename, index=False, mode='a' if i else 'w', header=not i)
+        if not len(data):
+            pd.DataFrame().to_csv(filename, index=False)
+        return
+    df = pd.DataFrame(data)
+    df.to_csv(filename, index=False)
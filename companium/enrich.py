@@ -0,0 +1,162 @@
+"""
+Обогащение таблицы с ИНН полями карточек одним вызовом: сначала хранилище, потом сеть.
+
+    from companium.enrich import enrich
+    df = enrich(df, 'debtor_inn', ['Короткое название', 'Статус'], max_age=timedelta(days=30))
+
+Все ИНН колонки разом ищутся в SQLite-хранилище (join по целому ключу, store.lookup_frame).
+Найденные и не устаревшие карточки отдаются сразу; отсутствующие, устаревшие (старше max_age)
+и сохранённые без полной карточки скачиваются одним прогоном асинхронного движка
+(process_inn_list пишет их в то же хранилище), после чего перечитываются оттуда.
+Поля возвращаются колонками, выровненными по строкам df; тип колонки задаётся полем
+(FIELD_TYPES: числа, списки и словари как есть, остальное — 'string'); нет данных — NA.
+
+В ноутбуке с уже запущенным циклом событий используйте await enrich_async(...).
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from companium import jsonio
+from companium.inn import format_inn, series_keys
+from companium.store import FLAT_COLUMNS, STORE_PATH, lookup_frame, open_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIELDS = list(FLAT_COLUMNS.values())
+# Тип колонки по полю (не по данным, чтобы тип не зависел от того, нашлось ли что-то):
+# числовые поля приводятся к числам (не число — NA), списки и словари остаются объектами,
+# остальные поля — 'string'
+FIELD_TYPES = {
+    'Дата последней отчетности': 'Float64',
+    'Финансовая отчетность': object,
+    'Генеральный директор': object,
+    'Учредители': object,
+    'Управляющая компания': object,
+    'Телефоны': object,
+    'Электронные почты': object,
+    'Веб сайты': object,
+    'Виды деятельности': object,
+    'Контракты по госзакупкам': object,
+}
+FLAT_FIELDS = {field: column for column, field in FLAT_COLUMNS.items()}
+
+
+def _max_age_seconds(max_age: Union[None, float, timedelta]) -> Optional[float]:
+    if isinstance(max_age, timedelta):
+        return max_age.total_seconds()
+    return max_age
+
+
+def _column(values: Sequence[Any], field: str) -> pd.Series:
+    series = pd.Series(values, dtype=object)
+    dtype = FIELD_TYPES.get(field, 'string')
+    if dtype is object:
+        return series
+    if dtype == 'string':
+        return series.astype('string')
+    return pd.to_numeric(series, errors='coerce').astype(dtype)
+
+
+def _lookup(conn: sqlite3.Connection, keys: np.ndarray, fields: List[str]) -> pd.DataFrame:
+    """
+    Строки хранилища для ключей: updated_at и значения полей (колонки — имена полей).
+    Если все поля плоские, карточки не разбираются; иначе отсутствующая карточка — NaN в 'card'.
+    """
+    flat = all(f in FLAT_FIELDS for f in fields)
+    columns = ['updated_at'] + ([FLAT_FIELDS[f] for f in fields] if flat else ['card'])
+    found = lookup_frame(conn, keys, columns)
+    if flat:
+        return found.rename(columns={FLAT_FIELDS[f]: f for f in fields})
+    with jsonio.paused_gc():
+        cards = [jsonio.loads(raw) if isinstance(raw, str) else None for raw in found['card']]
+    values = {f: [card.get(f) if isinstance(card, dict) else None for card in cards] for f in fields}
+    result = pd.DataFrame(values, index=found.index, dtype=object)
+    result['updated_at'] = found['updated_at']
+    result['card'] = [card is not None for card in cards]
+    return result
+
+
+async def enrich_async(df: pd.DataFrame, inn_column: str = 'debtor_inn',
+                       fields: Union[None, Sequence[str], Dict[str, str]] = None,
+                       max_age: Union[None, float, timedelta] = None,
+                       store: Union[str, sqlite3.Connection] = STORE_PATH, fetch: bool = True) -> pd.DataFrame:
+    """
+    Копия df с колонками полей карточек по колонке ИНН.
+    fields — список полей карточки или {поле: имя колонки в результате}, по умолчанию плоские поля хранилища;
+    max_age — секунды или timedelta: карточки старше перекачиваются (None — любые из хранилища годятся);
+    store — путь к хранилищу или открытое соединение; fetch=False — только хранилище, без сети.
+    Сводка (сколько найдено, скачано, не получено) — в result.attrs['enrich'].
+    """
+    fields = fields or DEFAULT_FIELDS
+    names = dict(fields) if isinstance(fields, dict) else {f: f for f in fields}
+    wanted = list(names)
+    conn = open_store(store) if isinstance(store, str) else store
+    try:
+        keys, lengths, valid = series_keys(df[inn_column])
+        unique, first = np.unique(keys[valid], return_index=True)
+        found = _lookup(conn, unique, wanted)
+
+        fresh = pd.Series(True, index=found.index)
+        if 'card' in found:
+            fresh &= found['card']
+        age = _max_age_seconds(max_age)
+        if age is not None:
+            fresh &= found['updated_at'] >= time.time() - age
+        missing = unique[~np.isin(unique, found.index[fresh].to_numpy())]
+        stats = {'inns': len(unique), 'hits': int(fresh.sum()), 'fetched': 0, 'failed': 0}
+
+        if len(missing) and fetch:
+            from companium import engine
+
+            inn_lengths = lengths[valid][first]
+            positions = np.searchsorted(unique, missing)
+            inns = [format_inn(k, n) for k, n in zip(missing.tolist(), inn_lengths[positions].tolist())]
+            logger.info(f"Обогащение: в хранилище {stats['hits']} из {len(unique)} ИНН, скачиваем {len(inns)}")
+            # С max_age кэш карточек без дат не годится: устаревшее перекачивается в обход него
+            before = found['updated_at'].reindex(missing)
+            cards = await engine.process_inn_list(inns, conn, refresh=age is not None)
+            found = _lookup(conn, unique, wanted)
+            # Получено то, что записано в хранилище этим прогоном: устаревшая строка, которую
+            # не удалось перекачать, осталась со старым updated_at и считается неудачей
+            updated = found['updated_at'].reindex(missing)
+            got = updated.notna() & (before.isna() | (updated > before))
+            if 'card' in found:
+                got &= found['card'].reindex(missing).fillna(False).astype(bool)
+            stats['fetched'] = int(got.sum())
+            stats['failed'] = len(missing) - stats['fetched']
+            if stats['failed']:
+                logger.warning(f"Обогащение: не получено {stats['failed']} ИНН из {len(missing)} "
+                               f"(движок вернул {len(cards)} карточек); для устаревших отданы прежние данные")
+        elif len(missing):
+            stats['failed'] = len(missing)
+    finally:
+        if isinstance(store, str):
+            conn.close()
+
+    result = df.copy()
+    keys = np.where(valid, keys, -1)
+    for field, name in names.items():
+        column = _column(found[field].tolist(), field)
+        aligned = pd.Series(column.to_numpy(), index=found.index, dtype=column.dtype).reindex(keys)
+        result[name] = aligned.set_axis(df.index)
+    result.attrs['enrich'] = stats
+    return result
+
+
+def enrich(df: pd.DataFrame, inn_column: str = 'debtor_inn',
+           fields: Union[None, Sequence[str], Dict[str, str]] = None,
+           max_age: Union[None, float, timedelta] = None,
+           store: Union[str, sqlite3.Connection] = STORE_PATH, fetch: bool = True) -> pd.DataFrame:
+    """Блокирующая обёртка над enrich_async (для скриптов и сервисов без своего цикла событий)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(enrich_async(df, inn_column, fields, max_age, store, fetch))
+    raise RuntimeError("Цикл событий уже запущен (ноутбук, сервис): используйте await enrich_async(...)")
@@ -0,0 +1,117 @@
+"""
+Компактное представление ИНН: int64-ключ + длина (10 — юрлицо, 12 — ИП/физлицо).
+
+Строка восстанавливается без потерь через zfill по длине, поэтому ИНН, у которых
+при чтении CSV "съели" ведущий ноль (9 или 11 цифр), приводятся к канону автоматически.
+"""
+import re
+from typing import Any, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INN_LEGAL = 10  # ИНН юридического лица
+INN_PERSON = 12  # ИНН физлица / ИП
+# Только ASCII-цифры: str.isdigit() и \d пропускают арабские, деванагари и надстрочные цифры
+DIGITS = r'[0-9]{9,12}'
+_DIGITS = re.compile(DIGITS)
+
+
+def parse_inn(value: Any) -> Optional[Tuple[int, int]]:
+    """Переводит ИНН (строка, число, '7701234567.0') в пару (ключ, длина) или None."""
+    if value is None:
+        return None
+    s = str(value).strip()
+    if s.endswith('.0'):
+        s = s[:-2]
+    if not _DIGITS.fullmatch(s):
+        return None
+    # 9/11 цифр — это 10/12-значный ИНН, потерявший ведущий ноль
+    length = len(s) + 1 if len(s) in (9, 11) else len(s)
+    return int(s), length
+
+
+def format_inn(key: int, length: int) -> str:
+    return str(int(key)).zfill(int(length))
+
+
+def canonical_inn(value: Any) -> Optional[str]:
+    """Каноническая строка ИНН с ведущими нулями или None для мусора."""
+    parsed = parse_inn(value)
+    return format_inn(*parsed) if parsed else None
+
+
+def series_keys(series: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Векторно разбирает колонку ИНН.
+    Возвращает (ключи int64, длины int8, маска валидных значений).
+    """
+    s = series.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    valid = s.str.fullmatch(DIGITS).fillna(False).to_numpy(dtype=bool)
+    raw_len = s.str.len().fillna(0).to_numpy(dtype=np.int64)
+    lengths = np.where((raw_len == 9) | (raw_len == 11), raw_len + 1, raw_len).astype(np.int8)
+    keys = pd.to_numeric(s.where(valid, '0'), errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    return keys, np.where(valid, lengths, 0).astype(np.int8), valid
+
+
+class InnArray:
+    """
+    Список ИНН на двух NumPy-массивах. Ведёт себя как последовательность строк
+    (len, срезы, итерация), поэтому подходит везде, где раньше был List[str].
+    """
+    __slots__ = ('keys', 'lengths')
+
+    def __init__(self, keys: np.ndarray, lengths: np.ndarray):
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.int8)
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> 'InnArray':
+        keys, lengths, valid = series_keys(series)
+        return cls(keys[valid], lengths[valid])
+
+    @classmethod
+    def from_strings(cls, values) -> 'InnArray':
+        return cls.from_series(pd.Series(list(values), dtype=object))
+
+    def codes(self) -> np.ndarray:
+        # Уникальный int64-код пары (ключ, длина): 10- и 12-значные ИНН не совпадут
+        return self.keys * 2 + (self.lengths == INN_PERSON)
+
+    def unique(self) -> 'InnArray':
+        """Уникальные ИНН в порядке первого появления (как pd.Series.unique)."""
+        _, first = np.unique(self.codes(), return_index=True)
+        first.sort()
+        return InnArray(self.keys[first], self.lengths[first])
+
+    def is_legal(self) -> np.ndarray:
+        return self.lengths == INN_LEGAL
+
+    def to_strings(self) -> list:
+        return [format_inn(k, n) for k, n in zip(self.keys.tolist(), self.lengths.tolist())]
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.lengths.nbytes
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[str]:
+        for k, n in zip(self.keys.tolist(), self.lengths.tolist()):
+            yield format_inn(k, n)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return InnArray(self.keys[item], self.lengths[item])
+        return format_inn(self.keys[item], self.lengths[item])
+
+    def __repr__(self) -> str:
+        return f"InnArray({len(self)} ИНН, {self.nbytes} байт)"
+
+
+def normalize_series(series: pd.Series) -> pd.Series:
+    """Колонка ИНН в каноническом виде (строки с ведущими нулями, None для мусора)."""
+    keys, lengths, valid = series_keys(series)
+    out = [format_inn(k, n) if ok else None for k, n, ok in zip(keys.tolist(), lengths.tolist(), valid.tolist())]
+    return pd.Series(out, index=series.index, dtype=object)
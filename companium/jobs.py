@@ -0,0 +1,269 @@
+"""
+Распределённый прогон: общая таблица заданий, из которой узлы-скраперы берут пачки ИНН в аренду.
+
+Таблица — SQLite-файл на общем диске (или локальный файл для одной машины). Узел атомарно
+забирает свободную пачку или пачку с истёкшей арендой, продлевает аренду heartbeat'ом, пока
+работает, и пишет карточки в общее хранилище по мере получения (upsert по ИНН, поэтому
+повторная запись безвредна). Каждая выдача пачки увеличивает token: завершить пачку может только
+узел с текущим token, запоздавший узел с отобранной арендой ничего не испортит. Если узел
+пропал, аренда истекает и пачка возвращается в пул; при повторной выдаче ИНН, уже записанные
+в хранилище после постановки пачки, не перекачиваются. Узлы можно добавлять и снимать на ходу.
+
+Журнал SQLite в режиме DELETE, а не WAL: WAL требует общей памяти и не работает через
+сетевые файловые системы. Другой бэкенд (Postgres, Redis) должен повторить методы JobTable.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from companium import engine
+from companium.inn import format_inn, parse_inn
+from companium.store import put_cards
+
+logger = logging.getLogger(__name__)
+
+JOBS_PATH = "jobs.db"
+BATCH_SIZE = 50  # ИНН в пачке
+LEASE_SECONDS = 300.0  # срок аренды пачки
+HEARTBEAT_EVERY = LEASE_SECONDS / 3
+POLL_INTERVAL = 10.0  # сек, ожидание, когда свободных пачек нет, но чужие ещё в работе
+MAX_CLAIMS = 5  # выдач пачки, после которых она считается "ядовитой"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    batch_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending | leased | done | failed
+    owner TEXT,
+    lease_until REAL,
+    token INTEGER NOT NULL DEFAULT 0,
+    claims INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    failures TEXT
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    inn INTEGER PRIMARY KEY,
+    inn_len INTEGER NOT NULL,
+    batch_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_items_batch ON job_items (batch_id);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until);
+"""
+
+
+class Lease(NamedTuple):
+    batch_id: int
+    token: int
+    created_at: float
+    inns: List[str]
+
+
+def node_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobTable:
+    def __init__(self, path: str = JOBS_PATH, lease_seconds: float = LEASE_SECONDS, max_claims: int = MAX_CLAIMS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_claims = max_claims
+        # isolation_level=None: транзакциями управляем сами (BEGIN IMMEDIATE при выдаче);
+        # check_same_thread=False: run_node обращается к таблице из своего потока базы
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, inns: Sequence[Any], batch_size: int = BATCH_SIZE) -> int:
+        """Ставит в очередь ИНН, которых ещё нет в таблице; возвращает число новых ИНН."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = set()
+            fresh = []
+            for inn in inns:
+                key = parse_inn(inn)
+                if key is None or key[0] in known:
+                    continue
+                known.add(key[0])
+                fresh.append(key)
+            existing = {row[0] for row in self.conn.execute("SELECT inn FROM job_items")}
+            fresh = [key for key in fresh if key[0] not in existing]
+            for i in range(0, len(fresh), batch_size):
+                batch_id = self.conn.execute("INSERT INTO jobs (created_at, updated_at) VALUES (?, ?)",
+                                             (now, now)).lastrowid
+                self.conn.executemany("INSERT INTO job_items VALUES (?, ?, ?)",
+                                      ((key, length, batch_id) for key, length in fresh[i:i + batch_size]))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(fresh)
+
+    def claim(self, owner: str) -> Optional[Lease]:
+        """Забирает свободную пачку или пачку с истёкшей арендой; None — выдавать нечего."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = self.conn.execute(
+                    "SELECT batch_id, claims, created_at FROM jobs "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                    "ORDER BY batch_id LIMIT 1", (now,)).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                batch_id, claims, created_at = row
+                if claims >= self.max_claims:
+                    # Пачку уже много раз выдавали и теряли — вероятно, она роняет узлы
+                    self.conn.execute("UPDATE jobs SET status = 'failed', owner = NULL, updated_at = ? "
+                                      "WHERE batch_id = ?", (now, batch_id))
+                    logger.error(f"Пачка {batch_id}: аренда терялась {claims} раз, пачка снята")
+                    continue
+                self.conn.execute("UPDATE jobs SET status = 'leased', owner = ?, lease_until = ?, "
+                                  "token = token + 1, claims = claims + 1, updated_at = ? WHERE batch_id = ?",
+                                  (owner, now + self.lease_seconds, now, batch_id))
+                token = self.conn.execute("SELECT token FROM jobs WHERE batch_id = ?", (batch_id,)).fetchone()[0]
+                inns = [format_inn(key, length) for key, length in self.conn.execute(
+                    "SELECT inn, inn_len FROM job_items WHERE batch_id = ? ORDER BY inn", (batch_id,))]
+                self.conn.execute("COMMIT")
+                return Lease(batch_id, token, created_at, inns)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def heartbeat(self, lease: Lease, owner: str) -> bool:
+        """Продлевает аренду; False — аренду уже отдали другому узлу."""
+        now = time.time()
+        cur = self.conn.execute("UPDATE jobs SET lease_until = ?, updated_at = ? "
+                                "WHERE batch_id = ? AND token = ? AND owner = ? AND status = 'leased'",
+                                (now + self.lease_seconds, now, lease.batch_id, lease.token, owner))
+        return cur.rowcount == 1
+
+    def complete(self, lease: Lease, owner: str, failures: Optional[Dict[str, List[str]]] = None) -> bool:
+        """Закрывает пачку; False — аренда устарела, результат засчитан другому узлу."""
+        now = time.time()
+        cur = self.conn.execute("UPDATE jobs SET status = 'done', owner = ?, lease_until = NULL, updated_at = ?, "
+                                "failures = ? WHERE batch_id = ? AND token = ? AND status = 'leased'",
+                                (owner, now, json.dumps(failures, ensure_ascii=False) if failures else None,
+                                 lease.batch_id, lease.token))
+        return cur.rowcount == 1
+
+    def release(self, lease: Lease, owner: str):
+        """Возвращает пачку в пул раньше срока (узел останавливается)."""
+        self.conn.execute("UPDATE jobs SET status = 'pending', owner = NULL, lease_until = NULL, "
+                          "claims = claims - 1, updated_at = ? WHERE batch_id = ? AND token = ? AND owner = ?",
+                          (time.time(), lease.batch_id, lease.token, owner))
+
+    def progress(self) -> Dict[str, int]:
+        """Число пачек по статусам; аренды с истёкшим сроком считаются как 'expired'."""
+        now = time.time()
+        counts = {'pending': 0, 'leased': 0, 'expired': 0, 'done': 0, 'failed': 0}
+        for status, expired, n in self.conn.execute(
+                "SELECT status, status = 'leased' AND lease_until < ?, COUNT(*) FROM jobs GROUP BY 1, 2", (now,)):
+            counts['expired' if expired else status] += n
+        return counts
+
+    def remaining(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def nodes(self) -> Dict[str, int]:
+        """Узлы с действующей арендой и число их пачек."""
+        rows = self.conn.execute("SELECT owner, COUNT(*) FROM jobs WHERE status = 'leased' AND lease_until >= ? "
+                                 "GROUP BY owner", (time.time(),))
+        return dict(rows.fetchall())
+
+
+def _stored_since(store: sqlite3.Connection, inns: Sequence[str], since: float) -> set:
+    """ИНН пачки, карточки которых уже записаны в хранилище после постановки пачки."""
+    keys = {parse_inn(inn)[0]: inn for inn in inns}
+    placeholders = ','.join('?' * len(keys))
+    rows = store.execute(f"SELECT inn FROM companies WHERE inn IN ({placeholders}) "
+                         f"AND card IS NOT NULL AND updated_at >= ?", (*keys, since))
+    return {keys[key] for key, in rows}
+
+
+def _in_thread(db: Executor, fn, *args) -> asyncio.Future:
+    return asyncio.get_running_loop().run_in_executor(db, fn, *args)
+
+
+async def _heartbeat(db: Executor, jobs: JobTable, lease: Lease, owner: str, work: asyncio.Task, every: float):
+    """Продлевает аренду, пока идёт работа; при потере аренды отменяет работу и завершается."""
+    while True:
+        await asyncio.sleep(every)
+        if not await _in_thread(db, jobs.heartbeat, lease, owner):
+            logger.warning(f"Пачка {lease.batch_id}: аренда потеряна, работа над ней прекращена")
+            work.cancel()
+            return
+
+
+async def run_node(jobs: JobTable, store: sqlite3.Connection, owner: Optional[str] = None,
+                   egress: Optional[Sequence[str]] = None, egress_rate: Optional[float] = None,
+                   max_batches: Optional[int] = None) -> int:
+    """
+    Рабочий цикл узла: брать пачки, пока в таблице есть незавершённые. Карточки пишутся
+    в store каждые CONCURRENT_REQUESTS ИНН, так что после потери аренды следующий узел
+    продолжит с места остановки. Возвращает число закрытых пачек.
+    Обращения к таблице заданий и хранилищу идут по одному в отдельном потоке: на общем
+    диске они могут ждать блокировку до timeout=60 сек, а цикл событий — нет.
+    """
+    owner = owner or node_name()
+    completed = 0
+    db = ThreadPoolExecutor(1, thread_name_prefix='companium-db')
+    session = await engine.open_session(egress, egress_rate)
+    try:
+        while max_batches is None or completed < max_batches:
+            lease = await _in_thread(db, jobs.claim, owner)
+            if lease is None:
+                if not await _in_thread(db, jobs.remaining):
+                    break
+                await asyncio.sleep(POLL_INTERVAL)  # остальное в чужой аренде; ждём, не истечёт ли
+                continue
+            done = await _in_thread(db, _stored_since, store, lease.inns, lease.created_at)
+            todo = [inn for inn in lease.inns if inn not in done]
+            logger.info(f"Пачка {lease.batch_id} (выдача {lease.token}): {len(todo)} ИНН, "
+                        f"уже в хранилище {len(done)}")
+            pending = []
+
+            def on_result(inn: str, card: Optional[Dict[str, Any]]):
+                if card is not None:
+                    pending.append((inn, card))
+
+            async def write_pending(at_least: int = engine.CONCURRENT_REQUESTS):
+                if pending and len(pending) >= at_least:
+                    cards = pending[:]
+                    pending.clear()
+                    await _in_thread(db, put_cards, store, cards)
+
+            work = asyncio.ensure_future(engine.run_inn_queue(session, todo, {}, None, on_result,
+                                                              keep_results=False, throttle=write_pending))
+            beat = asyncio.ensure_future(_heartbeat(db, jobs, lease, owner, work, HEARTBEAT_EVERY))
+            try:
+                _, failures = await work
+            except BaseException:
+                if beat.done() and not beat.cancelled():
+                    continue  # аренду отобрали, пачку доделает другой узел
+                await _in_thread(db, jobs.release, lease, owner)
+                raise
+            finally:
+                beat.cancel()
+                await write_pending(1)
+            if await _in_thread(db, jobs.complete, lease, owner, failures):
+                completed += 1
+                logger.info(f"Пачка {lease.batch_id} закрыта, не удалось ИНН: {len(failures)}; "
+                            f"осталось пачек: {await _in_thread(db, jobs.remaining)}")
+            else:
+                logger.warning(f"Пачка {lease.batch_id}: аренда истекла до завершения, закрыта другим узлом")
+    finally:
+        await session.close()
+        db.shutdown(wait=False)
+    logger.info(f"Узел {owner}: закрыто пачек {completed}; сводка: {engine.run_summary()}")
+    return completed
@@ -0,0 +1,96 @@
+"""
+Сериализация JSON: orjson или msgspec, если установлены, иначе стандартный json.
+
+Все функции работают с байтами UTF-8 (кириллица не экранируется, как ensure_ascii=False),
+поэтому ответы подсказок декодируются прямо из тела ответа, а файлы читаются и пишутся
+без промежуточной строки. Отличие быстрых бэкендов от stdlib: NaN/Infinity пишутся как null.
+"""
+import gc
+import json
+from contextlib import contextmanager
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+BACKENDS = [name for name, module in (('orjson', orjson), ('msgspec', msgspec)) if module is not None] + ['json']
+
+
+def _json_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _orjson_dumps(obj: Any, indent: bool = False) -> bytes:
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+
+def _msgspec_loads(data: Union[bytes, str]) -> Any:
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from e  # вызывающий код ловит ValueError, как у json
+
+
+def _msgspec_dumps(obj: Any, indent: bool = False) -> bytes:
+    raw = msgspec.json.encode(obj)
+    return msgspec.json.format(raw, indent=2) if indent else raw
+
+
+def use(backend: str):
+    """Переключает бэкенд ('orjson', 'msgspec', 'json'); по умолчанию — первый доступный из BACKENDS."""
+    global BACKEND, loads, dumps
+    if backend not in BACKENDS:
+        raise ValueError(f"JSON-бэкенд {backend} не установлен (доступны: {', '.join(BACKENDS)})")
+    BACKEND = backend
+    if backend == 'orjson':
+        loads, dumps = orjson.loads, _orjson_dumps
+    elif backend == 'msgspec':
+        loads, dumps = _msgspec_loads, _msgspec_dumps
+    else:
+        loads, dumps = _json_loads, _json_dumps
+
+
+BACKEND = BACKENDS[0]
+loads = _json_loads
+dumps = _json_dumps
+use(BACKEND)
+
+
+@contextmanager
+def paused_gc():
+    """
+    Отключает сборщик циклов на время создания множества объектов: при разборе кэша
+    (сотни тысяч вложенных словарей) он обходил бы их заново на каждом пороге.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load(path: str) -> Any:
+    with open(path, 'rb') as f:
+        raw = f.read()
+    with paused_gc():
+        return loads(raw)
+
+
+def dump(obj: Any, path: str, indent: bool = False):
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, indent))
@@ -0,0 +1,132 @@
+"""
+Адаптивные таймауты по наблюдаемым задержкам и бюджет хеджированных запросов.
+
+Для каждого эндпоинта (подсказки поиска, карточка, потоковый разбор) хранится окно
+последних задержек до первого байта (заголовков) и полного ответа; время установления
+соединения меряется через TraceConfig aiohttp. Пока замеров мало, действует таймаут
+по умолчанию, дальше — p99 * MARGIN в пределах [FLOOR, CEILING]. Окно строится по успешным
+ответам, поэтому отдельно считается доля таймаутов: если сайт стал медленнее и таймаутов
+больше MAX_TIMEOUT_SHARE, таймаут растёт в GROWTH раз на каждый новый таймаут (множитель
+не больше MAX_SCALE, сам таймаут — не больше CEILING), пока успешные ответы не вернут оценку. p95 полного ответа — порог для хеджированного повтора.
+"""
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Deque, Dict, List, Optional
+
+import aiohttp
+
+WINDOW = 500  # последних замеров на эндпоинт
+MIN_SAMPLES = 30  # замеров до перехода на адаптивный таймаут
+MARGIN = 2.0  # таймаут = p99 * MARGIN
+FLOOR = 1.0  # сек, нижняя граница таймаутов
+CEILING = 30.0  # сек, верхняя граница
+MAX_TIMEOUT_SHARE = 0.02  # доля таймаутов, выше которой таймаут расширяется
+GROWTH = 1.5
+MAX_SCALE = CEILING / FLOOR  # множитель таймаута; больше не нужно — любой таймаут уже упрётся в CEILING
+HEDGE_BUDGET = 0.05  # доля запросов, которые можно продублировать
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _clamp(seconds: float) -> float:
+    return min(CEILING, max(FLOOR, seconds))
+
+
+class EndpointLatency:
+    def __init__(self):
+        self.first_byte: Deque[float] = deque(maxlen=WINDOW)
+        self.total: Deque[float] = deque(maxlen=WINDOW)
+        self.outcomes: Deque[bool] = deque(maxlen=WINDOW)  # True — таймаут
+        self.timeouts = 0
+        self.scale = 1.0
+
+    def ready(self) -> bool:
+        return len(self.total) >= MIN_SAMPLES
+
+
+class LatencyStats:
+    def __init__(self, default: aiohttp.ClientTimeout):
+        self.default = default
+        self.endpoints: Dict[str, EndpointLatency] = {}
+        self.connect: Deque[float] = deque(maxlen=WINDOW)
+        self.calls = 0
+        self.hedges = 0
+
+    def _endpoint(self, name: str) -> EndpointLatency:
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointLatency()
+        return self.endpoints[name]
+
+    def observe(self, endpoint: str, first_byte: float, total: float):
+        e = self._endpoint(endpoint)
+        e.first_byte.append(first_byte)
+        e.total.append(total)
+        e.outcomes.append(False)
+        if sum(e.outcomes) <= MAX_TIMEOUT_SHARE * len(e.outcomes):
+            e.scale = 1.0
+
+    def observe_timeout(self, endpoint: str, timeout: aiohttp.ClientTimeout):
+        e = self._endpoint(endpoint)
+        e.timeouts += 1
+        e.outcomes.append(True)
+        if sum(e.outcomes) > MAX_TIMEOUT_SHARE * len(e.outcomes):
+            e.scale = min(e.scale * GROWTH, MAX_SCALE)
+
+    def timeout(self, endpoint: str) -> aiohttp.ClientTimeout:
+        e = self._endpoint(endpoint)
+        if not e.ready():
+            return self.default
+        connect = _clamp(percentile(self.connect, 0.99) * MARGIN) if len(self.connect) >= MIN_SAMPLES else None
+        return aiohttp.ClientTimeout(total=_clamp(percentile(e.total, 0.99) * MARGIN * e.scale),
+                                     sock_connect=connect,
+                                     sock_read=_clamp(percentile(e.first_byte, 0.99) * MARGIN * e.scale))
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """p95 полного ответа, после которого стоит отправить дубль; None — рано или бюджет исчерпан."""
+        self.calls += 1
+        e = self._endpoint(endpoint)
+        if not e.ready() or self.hedges >= HEDGE_BUDGET * self.calls:
+            return None
+        return percentile(e.total, 0.95)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """
+        Замер установления соединения и момент отправки запроса: запрос, переданный с
+        trace_request_ctx, получает в нём sent — так ожидание канала в пуле не считается задержкой.
+        """
+        async def on_connect_start(session, ctx: SimpleNamespace, params):
+            ctx.connect_started = time.monotonic()
+
+        async def on_connect_end(session, ctx: SimpleNamespace, params):
+            self.connect.append(time.monotonic() - ctx.connect_started)
+
+        async def on_request_start(session, ctx: SimpleNamespace, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx.sent = time.monotonic()
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_start.append(on_connect_start)
+        trace.on_connection_create_end.append(on_connect_end)
+        trace.on_request_start.append(on_request_start)
+        return trace
+
+    def summary(self) -> str:
+        lines: List[str] = []
+        if self.connect:
+            lines.append(f"  соединение: p50 {percentile(self.connect, 0.5):.2f}, "
+                         f"p99 {percentile(self.connect, 0.99):.2f} сек ({len(self.connect)} замеров)")
+        for name, e in self.endpoints.items():
+            if not e.total:
+                continue
+            timeout = self.timeout(name)
+            lines.append(f"  {name}: первый байт p50 {percentile(e.first_byte or [0], 0.5):.2f}, "
+                         f"ответ p50/p95/p99 {percentile(e.total, 0.5):.2f}/{percentile(e.total, 0.95):.2f}/"
+                         f"{percentile(e.total, 0.99):.2f} сек, таймаутов {e.timeouts}, "
+                         f"текущий таймаут {timeout.total:.1f} сек")
+        if self.hedges:
+            lines.append(f"  дублированных запросов: {self.hedges} из {self.calls}")
+        return '\n'.join(lines)
@@ -0,0 +1,201 @@
+"""
+Режим ограниченной памяти для долгих прогонов (100k+ ИНН на маленьких VM).
+
+- CompactCache: кэш карточек, где каждая карточка хранится сжатой компактной JSON-строкой
+  (байты), а не деревом словарей и строк; разворачивается только при обращении.
+- SpilledResults: результаты держатся в памяти до порога, дальше дописываются в JSONL
+  на диске; колонки (объединение ключей карточек) запоминаются для записи CSV по частям.
+- MemoryWatch: каждые N ИНН снимает отметки tracemalloc (текущее/пик) и RSS процесса
+  для итоговой сводки прогона.
+"""
+import json
+import logging
+import os
+import tempfile
+import tracemalloc
+import zlib
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from companium import jsonio
+
+logger = logging.getLogger(__name__)
+
+SPILL_PREFIX = "results_spill."  # файл сброса по умолчанию: results_spill.<случайное>.jsonl в текущем каталоге
+SPILL_AFTER = 1000  # карточек в памяти, после которых результаты пишутся на диск
+WATERMARK_EVERY = 1000  # ИНН между отметками памяти
+
+
+def _pack(card: Any) -> bytes:
+    return zlib.compress(jsonio.dumps(card), 1)
+
+
+def _unpack(raw: bytes) -> Any:
+    return jsonio.loads(zlib.decompress(raw))
+
+
+class CompactCache(MutableMapping):
+    """Словарь ИНН -> карточка с карточками в сжатом виде."""
+
+    def __init__(self, cards: Optional[Dict[str, Any]] = None):
+        self._data: Dict[str, bytes] = {}
+        if cards:
+            # Переносим по одной карточке, чтобы исходный словарь освобождался по ходу
+            while cards:
+                inn, card = cards.popitem()
+                self._data[inn] = _pack(card)
+
+    def __getitem__(self, inn: str) -> Any:
+        return _unpack(self._data[inn])
+
+    def __setitem__(self, inn: str, card: Any):
+        self._data[inn] = _pack(card)
+
+    def __delitem__(self, inn: str):
+        del self._data[inn]
+
+    def __contains__(self, inn: object) -> bool:
+        return inn in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def copy(self) -> 'CompactCache':
+        cache = CompactCache()
+        cache._data = self._data.copy()
+        return cache
+
+    def nbytes(self) -> int:
+        return sum(len(raw) for raw in self._data.values())
+
+    def dump(self, f):
+        """Пишет кэш в формате inn_cache.json, разворачивая по одной карточке."""
+        f.write('{')
+        for i, (inn, raw) in enumerate(self._data.items()):
+            f.write(',\n' if i else '\n')
+            f.write(f"{json.dumps(inn)}: {zlib.decompress(raw).decode('utf-8')}")
+        f.write('\n}')
+
+
+class SpilledResults:
+    """
+    Список карточек, который после spill_after элементов продолжается в JSONL-файле.
+    Без path файл создаётся при первом сбросе со случайным именем, чтобы параллельные
+    прогоны не затирали результаты друг друга.
+    С writer строки дописываются фоновым потоком (companium.writer.BackgroundWriter).
+    """
+
+    def __init__(self, path: Optional[str] = None, spill_after: int = SPILL_AFTER, writer=None):
+        self.path = path
+        self.spill_after = spill_after
+        self.writer = writer
+        self.columns: Dict[str, None] = {}  # упорядоченное объединение ключей карточек
+        self._memory: List[Dict[str, Any]] = []
+        self._spilled = 0
+        self._file = None
+
+    def append(self, card: Dict[str, Any]):
+        self.columns.update(dict.fromkeys(card))
+        if self._file is None and len(self._memory) < self.spill_after:
+            self._memory.append(card)
+            return
+        line = jsonio.dumps(card) + b'\n'
+        if self.path is None:
+            fd, self.path = tempfile.mkstemp(prefix=SPILL_PREFIX, suffix='.jsonl', dir='.')
+            os.close(fd)
+        if self.writer is not None:
+            if not self._spilled:
+                logger.info(f"Результатов больше {self.spill_after}, дальше пишем на диск: {self.path}")
+                self.writer.truncate(self.path)
+            self.writer.append(self.path, line)
+            self._spilled += 1
+            return
+        if self._file is None:
+            logger.info(f"Результатов больше {self.spill_after}, дальше пишем на диск: {self.path}")
+            self._file = open(self.path, 'wb')
+        self._file.write(line)
+        self._spilled += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return len(self._memory) + self._spilled
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        yield from self._memory
+        if self._spilled:
+            if self._file is not None:
+                self._file.flush()
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    yield jsonio.loads(line)
+
+    def chunks(self, size: int) -> Iterator[List[Dict[str, Any]]]:
+        chunk = []
+        for card in self:
+            chunk.append(card)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def rss_bytes() -> Optional[int]:
+    """Текущий RSS процесса; на системах без /proc — пиковый (ru_maxrss) или None."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _mb(value: Optional[int]) -> str:
+    return f"{value / 1024 / 1024:.0f} МБ" if value is not None else "н/д"
+
+
+class MemoryWatch:
+    """Отметки памяти каждые every ИНН (0 — только в конце): (ИНН обработано, tracemalloc текущая, пик, RSS)."""
+
+    def __init__(self, every: int = WATERMARK_EVERY, trace: bool = True):
+        self.every = every
+        self.marks: List[Tuple[int, int, int, Optional[int]]] = []
+        self._started_trace = trace and not tracemalloc.is_tracing()
+        if self._started_trace:
+            tracemalloc.start()
+
+    def sample(self, done: int, force: bool = False):
+        # every=0 — только итоговая отметка (force)
+        if not force and (not self.every or done % self.every) or self.marks and self.marks[-1][0] == done:
+            return
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        self.marks.append((done, current, peak, rss_bytes()))
+        logger.info(f"Память после {done} ИНН: python {_mb(current)} (пик {_mb(peak)}), RSS {_mb(rss_bytes())}")
+
+    def stop(self):
+        if self._started_trace:
+            tracemalloc.stop()
+            self._started_trace = False
+
+    def summary(self) -> str:
+        if not self.marks:
+            return "отметок памяти нет"
+        peak = max(mark[2] for mark in self.marks)
+        rss = [mark[3] for mark in self.marks if mark[3] is not None]
+        lines = [f"пик python {_mb(peak)}, пик RSS {_mb(max(rss) if rss else None)}"]
+        for done, current, mark_peak, mark_rss in self.marks:
+            lines.append(f"  {done:>8} ИНН: python {_mb(current)} (пик {_mb(mark_peak)}), RSS {_mb(mark_rss)}")
+        return '\n'.join(lines)
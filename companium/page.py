@@ -0,0 +1,384 @@
+"""
+Разбор страниц companium.ru: ссылка из подсказок поиска и карточка компании.
+
+Карточка собирается набором независимых экстракторов (EXTRACTORS). Ошибка в одном
+из них не обрывает разбор остальных. Если включено профилирование (enable_profiling),
+время и число ошибок каждого экстрактора накапливаются за весь прогон.
+"""
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+
+def extract_link(content: str) -> Optional[str]:
+    try:
+        href_start = content.find('href="') + 6
+        href_end = content.find('"', href_start)
+        return content[href_start:href_end]
+    except (IndexError, ValueError):
+        return None
+
+
+def get_copy_value(soup, id_):
+    el = soup.find(id=id_)
+    return el.get_text(strip=True) if el else None
+
+
+def get_block_value(soup, label):
+    block = soup.find('div', string=label)
+    if not block:
+        block = soup.find('div', class_='fw-bold', string=label)
+    if block:
+        sibling = block.find_next_sibling('div')
+        if sibling:
+            return sibling.get_text(strip=True)
+    return None
+
+
+def extract_requisites(soup, data):
+    # Основные реквизиты
+    data['ОРГН'] = get_copy_value(soup, 'copy-ogrn')
+    data['ИНН'] = get_copy_value(soup, 'copy-inn')
+    data['КПП'] = get_copy_value(soup, 'copy-kpp')
+    data['ОКПО'] = get_copy_value(soup, 'copy-okpo')
+    data['Адрес'] = get_copy_value(soup, 'copy-address')
+
+
+def extract_names(soup, data):
+    data['Короткое название'] = soup.find('h1', class_="mb-2").text
+    data['Полное название'] = soup.find('div', class_="fw-bold mb-2").text
+
+
+def extract_status(soup, data):
+    data['Статус'] = None
+    if soup.find('div', class_="text-success fw-bold"):
+        data['Статус'] = soup.find('div', class_="text-success fw-bold").text
+    elif soup.find('div', class_="text-danger fw-bold"):
+        data['Статус'] = soup.find('div', class_="text-danger fw-bold").text
+    else:
+        data['Статус'] = soup.find('div', class_="fw-bold special-status").text
+
+
+def extract_legal_form(soup, data):
+    data['Организационно-правовая форма'] = get_block_value(soup, 'Организационно-правовая форма')
+    data['Форма собственности'] = get_block_value(soup, 'Форма собственности')
+
+
+def extract_tax_system(soup, data):
+    block_sn = soup.find('div', class_="fw-bold", string='Система налогообложения')
+    if block_sn:
+        value_div = block_sn.find_next_sibling('div')
+        comment_div = block_sn.find_next_sibling('div', class_="text-secondary")
+
+        data['Система налогообложения'] = (
+                (value_div.get_text(strip=True) if value_div else '') +
+                " " +
+                (comment_div.get_text(strip=True) if comment_div else '')
+        )
+    else:
+        data['Система налогообложения'] = None
+
+
+def extract_financials(soup, data):
+    # Создаем словарь для хранения данных
+    financial_data = {
+        'Период': '',
+        'Значения': []
+    }
+
+    # Получаем период отчетности
+    period_header = soup.find('div', class_="fw-bold",
+                              string=lambda text: 'Финансовая отчетность' in text if text else False)
+    if not period_header:
+        # Нет блока отчетности — поле не заполняем (как и раньше)
+        return
+    financial_data['Период'] = period_header.get_text(strip=True)
+
+    # Парсим все элементы финансовой отчетности
+    for item in period_header.find_next_siblings('div'):
+        # Получаем название показателя
+        name = item.find('a', class_='link-pseudo')
+        if not name:
+            continue
+
+        # Получаем значение показателя
+        value = ''.join([text for text in item.stripped_strings][1:]).split('&nbsp;')[0].strip()
+
+        # Получаем изменение (если есть)
+        change = item.find('span', class_='financial-statement-change')
+        change_data = {
+            'value': change.get_text(strip=True) if change else None,
+            'tooltip': change.get('data-bs-title') if change else None
+        } if change else None
+
+        financial_data['Значения'].append({
+            'name': name.get_text(strip=True),
+            'value': value,
+            'change': change_data
+        })
+
+    data['Финансовая отчетность'] = financial_data
+
+
+def extract_report_year(soup, data):
+    # Год из выпадающего списка
+    reporting_year_tag = soup.find('span', id='accounting-huge-year')
+    if reporting_year_tag:
+        data['Дата последней отчетности'] = reporting_year_tag.get_text(strip=True)
+    else:
+        data['Дата последней отчетности'] = None
+
+
+def extract_management(soup, data):
+    # Генеральный директор или управляющая организация
+    ceo_block = soup.find('div', class_='flex-grow-1 ms-3')
+    if ceo_block:
+        data['Генеральный директор'] = {
+            'Должность': ceo_block.find('strong', class_='fw-bold').get_text(strip=True),
+            'Имя': ceo_block.find('a').get_text(strip=True),
+            'Ссылка': ceo_block.find('a')['href'],
+            'ИНН': ceo_block.find('span', class_='copy').get_text(strip=True)
+        }
+        return
+
+    for block in soup.find_all('div', class_='mb-3'):
+        if block.find('div', class_='fw-bold', string='Управляющая организация'):
+            data['Управляющая компания'] = {
+                'type': block.find('div', class_='fw-bold').get_text(strip=True),
+                'name': block.find('a').get_text(strip=True),
+                'link': block.find('a')['href'],
+                'since': block.find_next('div', class_='text-secondary').get_text(strip=True)
+            }
+            return
+
+
+def extract_founders(soup, data):
+    # Находим блок учредителей
+    founders_block = None
+    for block in soup.find_all('div', class_='mb-3'):
+        title = block.find('strong', class_=['fw-bold', 'fu-bold'],
+                           string=lambda t: t and 'Учредител' in t)
+        if title:
+            founders_block = block
+            break
+
+    if founders_block:
+        # Ищем только основную ссылку на учредителя (не history)
+        founder_link = founders_block.find('a', href=True, class_=lambda x: x != 'history')
+
+        if founder_link:
+            f_data = {
+                'Тип': 'Учредитель',
+                'Имя': founder_link.get_text(strip=True),
+                'Ссылка': founder_link['href'],
+                'С какого момента': (founders_block.find('div', class_='text-secondary').get_text(strip=True)
+                                     if founders_block.find('div', class_='text-secondary') else None)
+            }
+        else:
+            # Обработка случая "Нет сведений"
+            no_data = founders_block.find(string=lambda t: t and "Нет сведений" in t)
+            f_data = {
+                'Информация': no_data.strip() if no_data else 'Нет данных'
+            }
+    else:
+        f_data = {
+            'Ошибка': 'Блок не найден'
+        }
+
+    data['Учредители'] = f_data
+
+
+def extract_sanctions(soup, data):
+    sanctions_block = soup.find('div', string='Санкционные списки')
+    if sanctions_block:
+        sanctions_info = sanctions_block.find_next('div')
+        if sanctions_info:
+            data['Санкционные списки'] = sanctions_info.get_text(strip=True)
+
+
+def extract_contacts(soup, data):
+    # Находим все номера телефонов
+    data['Телефоны'] = [a.get_text(strip=True) for a in soup.select('a.link-black[href^="tel:"]')]
+    data['Электронные почты'] = [a.get_text(strip=True) for a in soup.select('a[href^="mailto:"]')]
+
+
+def extract_websites(soup, data):
+    # 1. Находим тег strong с названием компании
+    company_tag = soup.find('strong', class_='fw-bold d-block mt-3 mb-1')
+    websites = []
+    if company_tag:
+        # 2. Находим все последующие теги 'a' с веб-сайтами
+        for sibling in company_tag.find_next_siblings():
+            if sibling.name == 'a' and sibling.get('href', '').startswith('http'):
+                websites.append({
+                    'name': sibling.get_text(strip=True),
+                    'url': sibling['href']
+                })
+            # Прерываем цикл, если встречаем другой strong тег
+            elif sibling.name == 'strong':
+                break
+
+    data['Веб сайты'] = websites
+
+
+def extract_activities(soup, data):
+    # Виды деятельности
+    table = soup.find_all("table", class_="table table-md table-striped")[-1]
+    d = []
+
+    if table:
+        for row in table.find_all('tr'):
+            cols = row.find_all('td')
+            if len(cols) >= 2:
+                code = cols[0].get_text(strip=True)
+                link = cols[1].find('a')
+                if link:
+                    href = link.get('href', '')
+                    text = link.get_text(strip=True)
+                else:
+                    href = ''
+                    text = cols[1].get_text(strip=True)
+
+                extra_tip = cols[1].find('span', class_='extra-tip')
+                tip = extra_tip.get_text(strip=True) if extra_tip else ''
+
+                d.append({
+                    'code': code,
+                    'text': text,
+                    'href': href,
+                    'extra_tip': tip
+                })
+    data['Виды деятельности'] = d
+
+
+def extract_procurement(soup, data):
+    # Контракты по госзакупкам
+    section = soup.find_all('section', class_='x-section')[9]
+    text = section.get_text(" ", strip=True)
+
+    d = {}
+
+    # Проверка на отсутствие данных
+    if 'Нет сведений об участии компании' in text:
+        d['Наличие контрактов по госзакупкам'] = False
+    else:
+        # Извлекаем количество контрактов и общую сумму
+        try:
+            contract_text = section.find('div', class_='mb-2').text.strip()
+            contract_count = int(contract_text.split()[0])
+            amount_tag = section.find('a', class_='link-black')
+            amount_value = amount_tag.text.strip().split()[0].replace(',', '.')
+            amount_unit = amount_tag.find('span').text.strip()
+            total_amount = float(amount_value)
+
+            # Заказчик и Поставщик суммы
+            buttons = section.find_all('button', class_='nav-link')
+            customer_amount = None
+            customer_unit = None
+            supplier_amount = None
+            supplier_unit = None
+            for button in buttons:
+                btn_text = button.text
+                span = button.find('span', class_='text-muted fw-400')
+                if not span:
+                    continue
+                amount_parts = span.text.strip().split()
+                if len(amount_parts) >= 2:
+                    amount_val = float(amount_parts[0].replace(',', '.'))
+                    unit = ' '.join(amount_parts[1:])
+                    if 'Заказчик' in btn_text:
+                        customer_amount = amount_val
+                        customer_unit = unit
+                    elif 'Поставщик' in btn_text:
+                        supplier_amount = amount_val
+                        supplier_unit = unit
+
+            d['Наличие данных'] = True
+            d['Контракт'] = str(contract_count)
+            d['Сумма'] = str(total_amount) + " " + amount_unit  # в млрд руб.
+            d['Заказчик'] = str(customer_amount) + " " + customer_unit
+            d['Поставщик'] = str(supplier_amount) + " " + supplier_unit
+        except Exception:
+            d['Наличие контрактов по госзакупкам'] = False
+
+    data['Контракты по госзакупкам'] = d
+
+
+# Порядок экстракторов задаёт порядок полей в карточке
+EXTRACTORS: List[Tuple[str, Callable]] = [
+    ('requisites', extract_requisites),
+    ('names', extract_names),
+    ('status', extract_status),
+    ('legal_form', extract_legal_form),
+    ('tax_system', extract_tax_system),
+    ('financials', extract_financials),
+    ('report_year', extract_report_year),
+    ('management', extract_management),
+    ('founders', extract_founders),
+    ('sanctions', extract_sanctions),
+    ('contacts', extract_contacts),
+    ('websites', extract_websites),
+    ('activities', extract_activities),
+    ('procurement', extract_procurement),
+]
+
+
+class ParseProfile:
+    """Накопленное время и ошибки по экстракторам (и по построению дерева — 'soup')."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.pages = 0
+
+    def add(self, name: str, seconds: float, failed: bool = False):
+        self.seconds[name] += seconds
+        self.calls[name] += 1
+        if failed:
+            self.failures[name] += 1
+
+    def report(self) -> str:
+        total = sum(self.seconds.values()) or 1
+        lines = [f"Разобрано страниц: {self.pages}, всего {total:.2f} сек"]
+        for name, seconds in sorted(self.seconds.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name:<12} {seconds:8.3f} сек {100 * seconds / total:5.1f}%  "
+                         f"{1000 * seconds / max(self.calls[name], 1):7.2f} мс/стр  ошибок: {self.failures[name]}")
+        return '\n'.join(lines)
+
+
+profile: Optional[ParseProfile] = None
+
+
+def enable_profiling() -> ParseProfile:
+    global profile
+    profile = ParseProfile()
+    return profile
+
+
+def parse_company_page(html) -> Dict[str, Any]:
+    data = {}
+    started = time.perf_counter()
+    soup = BeautifulSoup(html, 'html.parser')
+    if profile is not None:
+        profile.pages += 1
+        profile.add('soup', time.perf_counter() - started)
+
+    for name, extractor in EXTRACTORS:
+        started = time.perf_counter()
+        failed = False
+        try:
+            extractor(soup, data)
+        except Exception as e:
+            failed = True
+            logger.warning(f"Ошибка {e} ({name})")
+        if profile is not None:
+            profile.add(name, time.perf_counter() - started, failed)
+    # Дерево со ссылками parent/child иначе ждёт циклического сборщика мусора
+    soup.decompose()
+    return data
@@ -0,0 +1,74 @@
+"""
+Очередь работ с отложенными повторами.
+
+Неудачная попытка не спит в корутине-воркере: ИНН кладётся в кучу отложенных повторов
+с экспоненциальной задержкой и джиттером, а воркер сразу берёт следующую свежую работу.
+Когда срок повтора наступает, ИНН возвращается в работу раньше свежих. У каждого ИНН
+ограниченный бюджет попыток; причины неудач сохраняются.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+BACKOFF_BASE = 2.0  # сек, базовая задержка для сетевых ошибок
+BACKOFF_BASE_429 = 5.0  # сек, базовая задержка для 429
+BACKOFF_CAP = 60.0  # сек, потолок задержки
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Экспоненциальная задержка с "equal jitter": от половины до полного окна."""
+    window = min(cap, base * 2 ** attempt)
+    return window / 2 + random.uniform(0, window / 2)
+
+
+class RetryQueue:
+    def __init__(self, items: Iterable[Hashable], max_attempts: int):
+        self.max_attempts = max_attempts
+        self.fresh = deque(items)
+        self.delayed: List[Tuple[float, int, Hashable, int]] = []  # (срок, порядковый номер, элемент, попытка)
+        self.failures: Dict[Hashable, List[str]] = {}  # причины неудачных попыток
+        self.exhausted: Dict[Hashable, List[str]] = {}  # ИНН, исчерпавшие бюджет попыток
+        self.in_flight = 0
+        self._seq = itertools.count()
+        self._changed = asyncio.Event()
+
+    async def get(self) -> Optional[Tuple[Hashable, int]]:
+        """Следующая работа (элемент, номер попытки) или None, когда всё обработано."""
+        while True:
+            now = time.monotonic()
+            if self.delayed and self.delayed[0][0] <= now:
+                _, _, item, attempt = heapq.heappop(self.delayed)
+                self.in_flight += 1
+                return item, attempt
+            if self.fresh:
+                self.in_flight += 1
+                return self.fresh.popleft(), 0
+            if not self.delayed and self.in_flight == 0:
+                self._changed.set()  # будим остальных воркеров, чтобы они тоже завершились
+                return None
+            timeout = self.delayed[0][0] - now if self.delayed else None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def done(self, item: Hashable):
+        self.in_flight -= 1
+        self._changed.set()
+
+    def retry(self, item: Hashable, attempt: int, reason: str, base: float = BACKOFF_BASE) -> Optional[float]:
+        """Откладывает повтор. Возвращает задержку или None, если бюджет попыток исчерпан."""
+        self.in_flight -= 1
+        self.failures.setdefault(item, []).append(reason)
+        self._changed.set()
+        if attempt + 1 >= self.max_attempts:
+            self.exhausted[item] = self.failures[item]
+            return None
+        delay = backoff_delay(attempt, base)
+        heapq.heappush(self.delayed, (time.monotonic() + delay, next(self._seq), item, attempt + 1))
+        return delay
@@ -0,0 +1,165 @@
+"""
+Шардированный прогон: список ИНН делится по хэшу между N процессами.
+
+У каждого шарда своя сессия (куки/заголовки), свои задержки между запросами и свой
+сегмент кэша (inn_cache.shard<N>.json). Координатор раздаёт работу небольшими чанками:
+если шард ловит много 429, он уходит на паузу, а его очередь перераспределяется между
+остальными. Результаты собираются в порядке исходного списка, сегменты кэша сливаются
+в общий кэш с сортировкой ключей — итог не зависит от того, кто что обработал.
+"""
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from companium import engine
+from companium.cardtable import CardTable
+from companium.inn import InnArray
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50  # ИНН в одном задании для шарда
+THROTTLE_RATIO = 0.2  # доля 429 на ИНН в чанке, после которой шард считается "задушенным"
+COOLDOWN = 120  # пауза для задушенного шарда, сек
+
+
+def shard_ids(inn_list: InnArray, shards: int) -> np.ndarray:
+    # Мультипликативный хэш, чтобы соседние ИНН одного региона не попадали в один шард
+    mixed = inn_list.codes().astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return ((mixed >> np.uint64(32)) % np.uint64(shards)).astype(np.int64)
+
+
+def partition(inn_list: InnArray, shards: int) -> List[InnArray]:
+    ids = shard_ids(inn_list, shards)
+    return [InnArray(inn_list.keys[ids == s], inn_list.lengths[ids == s]) for s in range(shards)]
+
+
+def shard_cache_path(shard: int, cache_dir: str = '.') -> str:
+    return os.path.join(cache_dir, f"inn_cache.shard{shard}.json")
+
+
+def default_identity(shard: int) -> Dict[str, Any]:
+    """Шард 0 использует основную сессию, остальные получают собственную сессионную куку от сайта."""
+    if shard == 0:
+        return {'cookies': dict(engine.COOKIES), 'headers': dict(engine.HEADERS)}
+    cookies = {k: v for k, v in engine.COOKIES.items() if k != '_companium_ru_session'}
+    return {'cookies': cookies, 'headers': dict(engine.HEADERS)}
+
+
+async def _serve(shard: int, identity: Dict[str, Any], cache_path: str, tasks, results):
+    # Одна сессия на весь шард: куки, выданные сайтом, живут между чанками
+    cache = await asyncio.to_thread(engine.load_cache, cache_path)
+    session = await engine.create_session(identity.get('cookies'), identity.get('headers'))
+    try:
+        while True:
+            chunk = await asyncio.to_thread(tasks.get)
+            if chunk is None:
+                break
+            before = engine.RUN_STATS['http_429']
+            found, _ = await engine.run_inn_queue(session, chunk, cache)
+            await asyncio.to_thread(engine.save_cache, cache, cache_path)
+            pairs = [(inn, found[inn]) for inn in chunk if found.get(inn) is not None]
+            results.put((shard, pairs, engine.RUN_STATS['http_429'] - before, len(chunk)))
+    finally:
+        await session.close()
+
+
+def _worker(shard: int, identity: Dict[str, Any], cache_path: str, tasks, results):
+    logging.basicConfig(level=logging.INFO, format=f"[shard {shard}] %(levelname)s %(message)s")
+    asyncio.run(_serve(shard, identity, cache_path, tasks, results))
+
+
+def merge_cache_segments(paths: Sequence[str], target: str = engine.CACHE_FILE) -> int:
+    cache = engine.load_cache(target)
+    for path in paths:
+        cache.update(engine.load_cache(path))
+    engine.save_cache(CardTable(sorted(cache.items())), target)
+    return len(cache)
+
+
+def run_sharded(inn_list: InnArray, shards: int, identities: Optional[List[Dict[str, Any]]] = None,
+                cache_dir: str = '.', chunk_size: int = CHUNK_SIZE) -> List[Tuple[str, Dict[str, Any]]]:
+    """Пары (ИНН из входного списка, карточка) в порядке списка; ИНН без карточки пропускаются."""
+    cache = engine.load_cache()
+    todo = InnArray.from_strings(inn for inn in inn_list if inn not in cache)
+    logger.info(f"В кэше {len(inn_list) - len(todo)} ИНН, к загрузке {len(todo)} на {shards} шардах")
+
+    pending = []
+    for part in partition(todo, shards):
+        pending.append(deque(part[i:i + chunk_size].to_strings() for i in range(0, len(part), chunk_size)))
+
+    ctx = mp.get_context('spawn')
+    task_queues = [ctx.Queue() for _ in range(shards)]
+    result_queue = ctx.Queue()
+    cache_paths = [shard_cache_path(s, cache_dir) for s in range(shards)]
+    procs = []
+    for s in range(shards):
+        identity = identities[s] if identities and s < len(identities) else default_identity(s)
+        p = ctx.Process(target=_worker, args=(s, identity, cache_paths[s], task_queues[s], result_queue))
+        p.start()
+        procs.append(p)
+
+    in_flight: List[Optional[list]] = [None] * shards
+    paused_until = [0.0] * shards
+    alive = [True] * shards
+    fetched: Dict[str, Any] = {}
+
+    def next_chunk(shard: int) -> Optional[list]:
+        if pending[shard]:
+            return pending[shard].popleft()
+        # Своя очередь пуста — забираем работу у самого загруженного шарда
+        donor = max(range(shards), key=lambda s: len(pending[s]))
+        return pending[donor].pop() if pending[donor] else None
+
+    try:
+        while any(pending) or any(c is not None for c in in_flight):
+            now = time.monotonic()
+            for s in range(shards):
+                if alive[s] and in_flight[s] is None and now >= paused_until[s]:
+                    chunk = next_chunk(s)
+                    if chunk is not None:
+                        in_flight[s] = chunk
+                        task_queues[s].put(chunk)
+            try:
+                shard, pairs, throttled, size = result_queue.get(timeout=1)
+            except queue.Empty:
+                for s in range(shards):
+                    if alive[s] and not procs[s].is_alive():
+                        logger.error(f"Шард {s} завершился аварийно, его работа возвращается в пул")
+                        alive[s] = False
+                        if not any(alive):
+                            raise RuntimeError("Все шарды завершились аварийно")
+                        heir = next(h for h in range(s + 1, s + shards) if alive[h % shards]) % shards
+                        if in_flight[s] is not None:
+                            pending[heir].append(in_flight[s])
+                            in_flight[s] = None
+                        pending[heir].extend(pending[s])
+                        pending[s].clear()
+                continue
+
+            in_flight[shard] = None
+            fetched.update(pairs)
+            if size and throttled / size >= THROTTLE_RATIO:
+                paused_until[shard] = time.monotonic() + COOLDOWN
+                others = [s for s in range(shards) if s != shard and alive[s]]
+                moved = 0
+                while others and len(pending[shard]) > 1:
+                    pending[others[moved % len(others)]].append(pending[shard].pop())
+                    moved += 1
+                logger.warning(f"Шард {shard}: {throttled} ответов 429 на {size} ИНН, пауза {COOLDOWN} сек, "
+                               f"передано чанков: {moved}")
+    finally:
+        for s in range(shards):
+            task_queues[s].put(None)
+        for p in procs:
+            p.join()
+
+    merge_cache_segments([p for p in cache_paths if os.path.exists(p)])
+    pairs = ((inn, fetched.get(inn) or cache.get(inn)) for inn in inn_list)
+    return [(inn, card) for inn, card in pairs if card]
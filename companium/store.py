@@ -0,0 +1,202 @@
+"""
+Постоянное хранилище карточек компаний на SQLite.
+
+ИНН хранится как INTEGER PRIMARY KEY (алиас rowid), поэтому поиск и join по ИНН —
+это индексный поиск по целому числу, а не хэширование строк. Длина исходного ИНН
+хранится отдельно, чтобы восстанавливать ведущие нули без потерь.
+"""
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from companium import jsonio
+from companium.inn import format_inn, parse_inn, series_keys
+
+STORE_PATH = "companium.db"
+
+# Колонки, которые вынесены из карточки в отдельные поля для быстрых фильтров
+FLAT_COLUMNS = {
+    'short_name': 'Короткое название',
+    'status': 'Статус',
+    'tax_system': 'Система налогообложения',
+    'report_year': 'Дата последней отчетности',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    inn INTEGER PRIMARY KEY,
+    inn_len INTEGER NOT NULL,
+    short_name TEXT,
+    status TEXT,
+    tax_system TEXT,
+    report_year REAL,
+    card TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+UPSERT = """
+INSERT INTO companies (inn, inn_len, short_name, status, tax_system, report_year, card, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(inn) DO UPDATE SET
+    inn_len = excluded.inn_len,
+    short_name = excluded.short_name,
+    status = excluded.status,
+    tax_system = excluded.tax_system,
+    report_year = excluded.report_year,
+    card = COALESCE(excluded.card, companies.card),
+    updated_at = excluded.updated_at
+"""
+
+
+
+
+def _partial_upsert(columns: Tuple[str, ...]) -> str:
+    """
+    UPSERT частичной карточки: обновляются только скачанные плоские поля, карточка и
+    updated_at не трогаются (updated_at — время последней полной карточки; новая строка
+    из одних частичных полей получает 0, то есть "полной карточки не было").
+    """
+    return f"""
+INSERT INTO companies (inn, inn_len, {', '.join(columns)}, updated_at)
+VALUES (?, ?{', ?' * len(columns)}, 0)
+ON CONFLICT(inn) DO UPDATE SET
+    {', '.join(['inn_len = excluded.inn_len'] + [f'{c} = excluded.{c}' for c in columns])}
+"""
+
+
+def open_store(path: str = STORE_PATH, wal: bool = True) -> sqlite3.Connection:
+    """
+    wal=False — для хранилища на общем (сетевом) диске: WAL там не работает.
+    Соединение можно передать фоновому потоку записи (process_inn_list): обращения к нему
+    идут по очереди, одновременно из двух потоков оно не используется.
+    """
+    conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+    conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def _report_year(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _row(inn: Any, card: Dict[str, Any], keep_card: bool = True) -> Optional[tuple]:
+    key = parse_inn(inn)
+    if key is None:
+        return None
+    return (
+        key[0], key[1],
+        card.get(FLAT_COLUMNS['short_name']),
+        card.get(FLAT_COLUMNS['status']),
+        card.get(FLAT_COLUMNS['tax_system']),
+        _report_year(card.get(FLAT_COLUMNS['report_year'])),
+        jsonio.dumps(card).decode('utf-8') if keep_card else None,
+        time.time(),
+    )
+
+
+def put_cards(conn: sqlite3.Connection, cards: Iterable[Tuple[Any, Dict[str, Any]]], keep_card: bool = True) -> int:
+    """
+    Записывает пары (ИНН, карточка) одной транзакцией. Возвращает число записанных строк.
+    keep_card=False — частичные карточки: обновить только присутствующие в них плоские поля,
+    не трогая сохранённую карточку, остальные поля и updated_at.
+    """
+    if not keep_card:
+        return _put_partial(conn, cards)
+    rows = [r for r in (_row(inn, card, keep_card) for inn, card in cards) if r is not None]
+    with conn:
+        conn.executemany(UPSERT, rows)
+    return len(rows)
+
+
+def _put_partial(conn: sqlite3.Connection, cards: Iterable[Tuple[Any, Dict[str, Any]]]) -> int:
+    # Строки группируются по набору полей, которые есть в частичной карточке
+    groups: Dict[Tuple[str, ...], List[tuple]] = {}
+    for inn, card in cards:
+        key = parse_inn(inn)
+        if key is None:
+            continue
+        columns = tuple(c for c, field in FLAT_COLUMNS.items() if field in card)
+        values = [_report_year(card[f]) if c == 'report_year' else card[f]
+                  for c, f in FLAT_COLUMNS.items() if c in columns]
+        groups.setdefault(columns, []).append((key[0], key[1], *values))
+    with conn:
+        for columns, rows in groups.items():
+            if columns:
+                conn.executemany(_partial_upsert(columns), rows)
+            else:
+                conn.executemany("INSERT INTO companies (inn, inn_len, updated_at) VALUES (?, ?, 0) "
+                                 "ON CONFLICT(inn) DO NOTHING", rows)
+    return sum(len(rows) for rows in groups.values())
+
+
+def get_card(conn: sqlite3.Connection, inn: Any) -> Optional[Dict[str, Any]]:
+    key = parse_inn(inn)
+    if key is None:
+        return None
+    row = conn.execute("SELECT card FROM companies WHERE inn = ?", (key[0],)).fetchone()
+    return jsonio.loads(row[0]) if row and row[0] else None
+
+
+def import_companium_csv(conn: sqlite3.Connection, path: str) -> int:
+    """Загружает в хранилище уже распарсенный CSV (колонка 'ИНН' + плоские поля)."""
+    df = pd.read_csv(path, dtype={'ИНН': str})
+    df = df.astype(object).where(df.notna(), None)
+    rows = []
+    for rec in df.to_dict('records'):
+        row = _row(rec.get('ИНН'), rec, keep_card=False)
+        if row is not None:
+            rows.append(row)
+    with conn:
+        conn.executemany(UPSERT, rows)
+    return len(rows)
+
+
+def lookup_frame(conn: sqlite3.Connection, keys: Iterable[int],
+                 columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Возвращает плоские поля для набора целых ключей ИНН (индекс — ключ).
+    Ключи загружаются во временную таблицу, дальше — join по первичному ключу.
+    """
+    columns = columns or list(FLAT_COLUMNS)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (inn INTEGER PRIMARY KEY)")
+    with conn:
+        conn.execute("DELETE FROM wanted")
+        conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((int(k),) for k in keys))
+    query = f"SELECT c.inn, {', '.join('c.' + c for c in columns)} FROM wanted w JOIN companies c ON c.inn = w.inn"
+    return pd.read_sql_query(query, conn, index_col='inn')
+
+
+def enrich_frame(conn: sqlite3.Connection, df: pd.DataFrame, inn_column: str,
+                 columns: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Добавляет к df поля из хранилища по колонке ИНН.
+    columns: {колонка хранилища: имя колонки в результате}.
+    """
+    columns = columns or {c: FLAT_COLUMNS[c] for c in FLAT_COLUMNS}
+    keys, _, valid = series_keys(df[inn_column])
+    keys = np.where(valid, keys, -1)
+    found = lookup_frame(conn, np.unique(keys[valid]), list(columns))
+    positions = found.index.get_indexer(keys)
+    result = df.copy()
+    for src, dst in columns.items():
+        values = found[src].to_numpy()
+        column = pd.Series(values[positions], index=df.index) if len(values) else pd.Series(None, index=df.index)
+        result[dst] = column.where(positions >= 0)
+    return result
+
+
+def read_companium_frame(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Плоские поля всех компаний в формате распарсенного CSV (ИНН — строка с ведущими нулями)."""
+    df = pd.read_sql_query(
+        "SELECT inn, inn_len, short_name, status, tax_system, report_year FROM companies ORDER BY inn", conn)
+    df.insert(0, 'ИНН', [format_inn(k, n) for k, n in zip(df['inn'], df['inn_len'])])
+    return df.drop(columns=['inn', 'inn_len']).rename(columns=FLAT_COLUMNS)
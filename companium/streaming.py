@@ -0,0 +1,137 @@
+"""
+Потоковый разбор страницы компании с ранним завершением.
+
+Чанки ответа подаются в инкрементальный HTMLParser по мере прихода. Как только все
+запрошенные поля найдены, соединение закрывается — остаток страницы (финансы, ОКВЭД,
+госзакупки) не скачивается и не декодируется. Поддерживаются только "верхние" поля,
+которые находятся по id или классу элемента; остальное — через полный parse_company_page.
+"""
+import codecs
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from companium.compression import decompressor
+
+CHUNK_SIZE = 16 * 1024
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+def _by_id(id_: str) -> Callable[[str, Dict[str, str]], bool]:
+    return lambda tag, attrs: attrs.get('id') == id_
+
+
+def _by_class(tag_name: str, *classes: str) -> Callable[[str, Dict[str, str]], bool]:
+    wanted = set(classes)
+    return lambda tag, attrs: tag == tag_name and wanted <= set((attrs.get('class') or '').split())
+
+
+def _by_class_string(tag_name: str, classes: str) -> Callable[[str, Dict[str, str]], bool]:
+    # Как soup.find(tag, class_="a b"): строка class совпадает целиком
+    return lambda tag, attrs: tag == tag_name and attrs.get('class') == classes
+
+
+# Поле карточки -> условие на открывающий тег элемента с его значением или кортеж условий
+# по убыванию приоритета (как порядок проверок в page.extract_*): значение берётся от лучшего
+# найденного кандидата, поэтому без первого из них страница дочитывается до конца
+STREAMABLE_FIELDS = {
+    'ОРГН': _by_id('copy-ogrn'),
+    'ИНН': _by_id('copy-inn'),
+    'КПП': _by_id('copy-kpp'),
+    'ОКПО': _by_id('copy-okpo'),
+    'Адрес': _by_id('copy-address'),
+    'Короткое название': _by_class('h1', 'mb-2'),
+    'Статус': (
+        _by_class_string('div', 'text-success fw-bold'),
+        _by_class_string('div', 'text-danger fw-bold'),
+        _by_class_string('div', 'fw-bold special-status'),
+    ),
+    'Дата последней отчетности': _by_id('accounting-huge-year'),
+}
+
+# Эти поля parse_company_page берёт через .text (без strip) — повторяем поведение
+RAW_TEXT_FIELDS = {'Короткое название', 'Статус'}
+
+
+def _candidates(matcher) -> tuple:
+    return matcher if isinstance(matcher, tuple) else (matcher,)
+
+
+def can_stream(fields: Iterable[str]) -> bool:
+    return all(f in STREAMABLE_FIELDS for f in fields)
+
+
+class FieldStreamParser(HTMLParser):
+    def __init__(self, fields: Iterable[str]):
+        super().__init__(convert_charrefs=True)
+        self.pending = {f: _candidates(STREAMABLE_FIELDS[f]) for f in fields}
+        self.data: Dict[str, Any] = {f: None for f in self.pending}
+        self._field: Optional[str] = None
+        self._depth = 0
+        self._parts = []
+
+    @property
+    def done(self) -> bool:
+        return not self.pending and self._field is None
+
+    def handle_starttag(self, tag, attrs):
+        if self._field is not None:
+            if tag not in VOID_TAGS:
+                self._depth += 1
+            return
+        attrs = dict(attrs)
+        for field, candidates in self.pending.items():
+            rank = next((i for i, match in enumerate(candidates) if match(tag, attrs)), None)
+            if rank is None:
+                continue
+            self._field = field
+            self._depth = 0 if tag in VOID_TAGS else 1
+            self._parts = []
+            # Дальше ждём только кандидатов приоритетнее найденного
+            if rank:
+                self.pending[field] = candidates[:rank]
+            else:
+                del self.pending[field]
+            if self._depth == 0:
+                self._finish()
+            break
+
+    def handle_endtag(self, tag):
+        if self._field is None or tag in VOID_TAGS:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self._finish()
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._parts.append(data if self._field in RAW_TEXT_FIELDS else data.strip())
+
+    def _finish(self):
+        # Как BeautifulSoup.get_text(strip=True): куски текста без пробелов по краям, склеенные подряд
+        self.data[self._field] = ''.join(self._parts)
+        self._field = None
+
+
+async def stream_fields(response, fields: Iterable[str], stats: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Читает тело aiohttp-ответа чанками, пока не найдены все поля; затем закрывает соединение."""
+    parser = FieldStreamParser(fields)
+    decompress = decompressor(response.headers.get('Content-Encoding'))
+    decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        body = decompress(chunk)
+        if stats is not None:
+            stats['bytes_wire'] += len(chunk)
+            stats['bytes_decoded'] += len(body)
+        parser.feed(decoder.decode(body))
+        if parser.done:
+            if stats is not None:
+                stats['stream_early_exit'] += 1
+            response.close()
+            break
+    else:
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+    if stats is not None:
+        stats['responses'] += 1
+    return parser.data
@@ -0,0 +1,321 @@
+"""
+Фоновая запись на диск для асинхронного прогона.
+
+BackgroundWriter — поток с ограниченной очередью. Цикл событий только ставит задания:
+дописать байты в файл, вызвать функцию (запись в SQLite, ленту изменений, снимок кэша)
+или обрезать файл. Поток забирает задания группами (до GROUP_MAX штук или GROUP_WAIT сек),
+склеивает дописывания в один файл в одну запись и делает fsync по политике — group commit.
+Порядок заданий сохраняется. Постановка никогда не блокирует цикл событий; если в очереди
+больше max_queue заданий, корутины ждут места через await room() (ожидание идёт в пуле
+потоков), так что память ограничена, а запись, отстающая от скрапера, видна в статистике
+(backpressure).
+
+Кэш карточек во время прогона не переписывается целиком после каждой пачки: каждая новая
+карточка дописывается строкой в журнал (<кэш>.journal), а полный снимок делается редко;
+после снимка журнал обрезается. load_cache проигрывает журнал поверх снимка.
+
+Логи на время прогона уходят через QueueHandler в отдельный поток (queued_logging);
+при переполнении очереди записи отбрасываются и считаются, цикл событий не ждёт.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from companium import jsonio
+
+logger = logging.getLogger(__name__)
+
+MAX_QUEUE = 10_000  # заданий в очереди до того, как постановка начнёт ждать
+GROUP_MAX = 1000  # заданий в одной групповой записи
+GROUP_WAIT = 0.05  # сек, сколько собирать группу после первого задания
+FSYNC = 'group'  # 'group' — fsync после каждой группы, 'interval' — не чаще FSYNC_INTERVAL, 'never'
+FSYNC_INTERVAL = 1.0
+LOG_QUEUE = 10_000
+JOURNAL_SUFFIX = '.journal'
+
+
+def journal_path(cache_path: str) -> str:
+    return cache_path + JOURNAL_SUFFIX
+
+
+class BackgroundWriter:
+    def __init__(self, max_queue: int = MAX_QUEUE, group_max: int = GROUP_MAX, group_wait: float = GROUP_WAIT,
+                 fsync: str = FSYNC, fsync_interval: float = FSYNC_INTERVAL):
+        if fsync not in ('group', 'interval', 'never'):
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
+        self.max_queue = max_queue
+        self.group_max = group_max
+        self.group_wait = group_wait
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.stats = Counter()
+        self.error: Optional[BaseException] = None
+        # Очередь без предела: предел max_queue соблюдают корутины через room(), а не put
+        self._queue: queue.Queue = queue.Queue()
+        self._room = threading.Condition()
+        self._files: Dict[str, BinaryIO] = {}
+        self._dirty: set = set()  # пути, записанные после последнего fsync
+        self._dirs: set = set()  # каталоги файлов, подменённых через os.replace (sync= у call)
+        self._last_sync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='companium-writer', daemon=True)
+        self._thread.start()
+
+    # --- постановка заданий (вызывается из цикла событий) ---
+
+    def _put(self, item: tuple):
+        if self.error is not None:
+            raise RuntimeError("Фоновая запись остановлена из-за ошибки") from self.error
+        self._queue.put_nowait(item)
+
+    def _full(self) -> bool:
+        return self._queue.qsize() >= self.max_queue and self.error is None and self._thread.is_alive()
+
+    def _wait_room(self):
+        with self._room:
+            while self._full():
+                self._room.wait(0.1)
+
+    async def room(self):
+        """Ждёт, пока очередь не опустеет ниже max_queue; цикл событий при этом не блокируется."""
+        if self._full():
+            self.stats['backpressure'] += 1
+            await asyncio.to_thread(self._wait_room)
+
+    def append(self, path: str, data: bytes):
+        self._put(('append', path, data))
+
+    def call(self, fn: Callable, *args, sync: Optional[str] = None, **kwargs):
+        """fn(*args, **kwargs) в потоке записи; sync — путь файла, который fn записала и который надо fsync."""
+        self._put(('call', fn, args, kwargs, sync))
+
+    def truncate(self, path: str):
+        self._put(('truncate', path))
+
+    def flush(self):
+        """Ждёт, пока всё поставленное до этого момента будет записано."""
+        done = threading.Event()
+        self._put(('flush', done))
+        done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        if self.error is not None:
+            raise RuntimeError("Фоновая запись завершилась с ошибкой") from self.error
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"групп {s['groups']}, заданий {s['items']}, дописано {s['bytes'] / 1024 / 1024:.1f} МБ, "
+                f"fsync {s['fsyncs']}, ожиданий очереди {s['backpressure']}")
+
+    # --- поток записи ---
+
+    def _file(self, path: str) -> BinaryIO:
+        f = self._files.get(path)
+        if f is None:
+            f = self._files[path] = open(path, 'ab')
+        return f
+
+    def _collect(self) -> List[Optional[tuple]]:
+        group = [self._queue.get()]
+        deadline = time.monotonic() + self.group_wait
+        while group[-1] is not None and len(group) < self.group_max:
+            remaining = deadline - time.monotonic()
+            try:
+                group.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _write_appends(self, buffers: Dict[str, List[bytes]]):
+        for path, chunks in buffers.items():
+            data = b''.join(chunks)
+            f = self._file(path)
+            f.write(data)
+            f.flush()
+            self._dirty.add(path)
+            self.stats['bytes'] += len(data)
+        buffers.clear()
+
+    def _sync(self, force: bool = False):
+        if self.fsync == 'never' or not (self._dirty or self._dirs):
+            return
+        if not force and self.fsync == 'interval' and time.monotonic() - self._last_sync < self.fsync_interval:
+            return
+        for path in self._dirty:
+            f = self._files.get(path)
+            if f is not None:
+                os.fsync(f.fileno())
+            elif os.path.exists(path):
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            self.stats['fsyncs'] += 1
+        # Новая запись каталога после os.replace переживёт сбой питания только после fsync каталога
+        for directory in self._dirs:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.stats['fsyncs'] += 1
+        self._dirty.clear()
+        self._dirs.clear()
+        self._last_sync = time.monotonic()
+
+    def _process(self, group: List[Optional[tuple]]) -> bool:
+        """Выполняет группу по порядку; False — пришёл сигнал остановки."""
+        buffers: Dict[str, List[bytes]] = {}
+        running = True
+        for item in group:
+            if item is None:
+                running = False
+                break
+            self.stats['items'] += 1
+            kind = item[0]
+            if kind == 'append':
+                buffers.setdefault(item[1], []).append(item[2])
+                continue
+            # Всё, что было дописано до этого задания, должно оказаться на диске раньше него
+            self._write_appends(buffers)
+            if kind == 'call':
+                _, fn, args, kwargs, sync = item
+                fn(*args, **kwargs)
+                if sync:
+                    self._dirty.add(sync)
+                    self._dirs.add(os.path.dirname(os.path.abspath(sync)))
+            elif kind == 'truncate':
+                path = item[1]
+                # Обрезка журнала не должна дойти до диска раньше снимка, который его заменяет
+                self._sync(force=True)
+                f = self._files.pop(path, None)
+                if f is not None:
+                    f.close()
+                open(path, 'wb').close()
+            elif kind == 'flush':
+                self._sync(force=True)
+                item[1].set()
+        self._write_appends(buffers)
+        self._sync(force=not running)
+        self.stats['groups'] += 1
+        with self._room:
+            self._room.notify_all()
+        return running
+
+    def _run(self):
+        while True:
+            group = self._collect()
+            try:
+                if not self._process(group):
+                    return
+            except BaseException as e:
+                logger.exception(f"Ошибка фоновой записи: {e}")
+                self.error = e
+                # Не блокируем ожидающих flush: отпускаем их, дальше задания не выполняются
+                for item in group:
+                    if item is not None and item[0] == 'flush':
+                        item[1].set()
+                self._drain()
+                return
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if item[0] == 'flush':
+                item[1].set()
+
+
+class JournaledCache(MutableMapping):
+    """Обёртка кэша: каждая запись карточки дописывается в журнал через BackgroundWriter."""
+
+    def __init__(self, cache: MutableMapping, writer: BackgroundWriter, path: str):
+        self.cache = cache
+        self.writer = writer
+        self.path = path
+        self.written = 0
+
+    def __getitem__(self, inn: str) -> Any:
+        return self.cache[inn]
+
+    def __setitem__(self, inn: str, card: Any):
+        self.cache[inn] = card
+        self.written += 1
+        self.writer.append(self.path, jsonio.dumps([inn, card]) + b'\n')
+
+    def __delitem__(self, inn: str):
+        del self.cache[inn]
+
+    def __contains__(self, inn: object) -> bool:
+        return inn in self.cache
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.cache)
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+
+def replay_journal(cache: MutableMapping, path: str) -> int:
+    """Применяет журнал к загруженному снимку; оборванная последняя строка (сбой при записи) пропускается."""
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                inn, card = jsonio.loads(line)
+            except ValueError:
+                logger.warning(f"Журнал {path}: пропущена повреждённая строка")
+                continue
+            cache[inn] = card
+            applied += 1
+    return applied
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+@contextmanager
+def queued_logging(max_queue: int = LOG_QUEUE):
+    """На время блока обработчики корневого логгера работают в отдельном потоке."""
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    if not handlers:
+        yield None
+        return
+    handler = _DroppingQueueHandler(queue.Queue(max_queue))
+    listener = QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    root.handlers = [handler]
+    listener.start()
+    try:
+        yield handler
+    finally:
+        listener.stop()
+        root.handlers = handlers
+        if handler.dropped:
+            logger.warning(f"Очередь логов переполнялась, отброшено записей: {handler.dropped}")
@@ -1,33 +1,17 @@
-import pandas as pd
+from profile_dataset import format_report, profile_dataset
 
-def inspect_debtor_inn_column(csv_path):
+def inspect_debtor_inn_column(csv_path, column='debtor_inn', bad_rows_path=None):
     """
-    Inspects the debtor_inn column for potential issues that could cause NoneType errors.
-    Returns the full column and prints diagnostic information.
+    Inspects an INN column (debtor_inn by default) for values that could cause NoneType errors:
+    empty strings, 'None'/'nan' sentinels, malformed digits and bad checksums.
+    Single streaming pass via profile_dataset; returns the column profile.
     """
-    # Read CSV with debtor_inn as string
-    df = pd.read_csv(csv_path, dtype={'debtor_inn': str}, keep_default_na=False)
-    
-    # Get the column
-    inn_column = df['debtor_inn']
-    
-    # Print diagnostic info
-    print("=== Column Overview ===")
-    print(f"Total rows: {len(inn_column)}")
-    print(f"Non-empty values: {inn_column.notna().sum()}")
-    print(f"Empty strings: {(inn_column == '').sum()}")
-    print(f"'None' strings: {(inn_column == 'None').sum()}")
-    print(f"'nan' strings: {(inn_column == 'nan').sum()}")
-    print("\n=== Sample Values ===")
-    print(inn_column.head(20))
-    
-    # Find problematic rows
-    problematic = df[df['debtor_inn'].isna() | (df['debtor_inn'] == '')]
-    if not problematic.empty:
-        print("\n=== Problematic Rows ===")
-        print(problematic)
-    
-    return inn_column
+    profiles = profile_dataset(csv_path, inn_columns=[column], columns=[column], bad_rows_path=bad_rows_path)
+    print(format_report(profiles))
+    if bad_rows_path:
+        print(f"Problematic rows saved to {bad_rows_path}")
+    return profiles[column]
 
 # Usage:
-inn_data = inspect_debtor_inn_column("data/cleaned___debt_creditors_add0.csv")
\ No newline at end of file
+if __name__ == '__main__':
+    inn_profile = inspect_debtor_inn_column("data/cleaned___debt_creditors_add0.csv")
@@ -1,8 +1,15 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import json
+import os
 import re
 import ast
+import sys
+
+# companium lives next to filter/: make it importable when this file is run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from companium.inn import InnArray, series_keys  # noqa: E402
 
 def safe_literal_eval(val):
     """Safely evaluate string containing Python literals"""
@@ -13,19 +20,19 @@ def safe_literal_eval(val):
     except (ValueError, SyntaxError):
         return []
 
-def load_data(companium_path: str, main_data_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Load both datasets with INN as strings"""
-    # Load companium data
-    companium_df = pd.read_csv(
+def load_companium_data(companium_path: str) -> pd.DataFrame:
+    """Load the parsed companium CSV with INN as strings"""
+    return pd.read_csv(
         companium_path,
         dtype={'ИНН': str},
         converters={
             'Дата последней отчетности': lambda x: float(x) if str(x).replace('.','').isdigit() else np.nan
         }
     )
-    
-    # Load main data with safe literal evaluation
-    main_df = pd.read_csv(
+
+def load_main_data(main_data_path: str) -> pd.DataFrame:
+    """Load the main table with INN as strings and list columns evaluated"""
+    return pd.read_csv(
         main_data_path,
         dtype={'debtor_inn': str},
         converters={
@@ -34,91 +41,135 @@ def load_data(companium_path: str, main_data_path: str) -> tuple[pd.DataFrame, p
             'Веб сайты': safe_literal_eval
         }
     )
-    
-    return companium_df, main_df
+
+def load_data(companium_path: str, main_data_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Load both datasets with INN as strings"""
+    return load_companium_data(companium_path), load_main_data(main_data_path)
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'filter_rules.json')
+
+RU_MONTHS = {
+    'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4, 'мая': 5, 'июня': 6,
+    'июля': 7, 'августа': 8, 'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12
+}
+
+def load_rules(path: str = RULES_PATH) -> dict:
+    """Load filter rules: {'companium': [...], 'result': [...]}, each rule a dict with name and type"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _to_float(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors='coerce').astype(float)
+
+def _assemble_dates(year: pd.Series, month, day) -> pd.Series:
+    return pd.to_datetime(pd.DataFrame({'year': _to_float(year), 'month': month, 'day': day}), errors='coerce')
+
+def _year_end(years: pd.Series) -> pd.Series:
+    """Years (numbers or numeric strings, 2022.0 included) -> Dec 31 of that year, NaT if missing"""
+    return _assemble_dates(years, 12, 31)
+
+def liquidation_dates(status: pd.Series) -> pd.Series:
+    """
+    Vectorized liquidation date from status text, first match wins:
+    - Russian dates ("ликвидировано 31 января 2025")
+    - ISO dates ("ликвидировано 2025-01-31")
+    - 'Исключение из ЕГРЮЛ ... <year>' (Dec 31 of that year)
+    """
+    status = status.astype('string')
+    ru = status.str.extract(r'ликвидировано (\d{1,2}) (\w+) (\d{4})')
+    dates = _assemble_dates(ru[2], _to_float(ru[1].map(RU_MONTHS)), _to_float(ru[0]))
+    iso = pd.to_datetime(status.str.extract(r'ликвидировано (\d{4}-\d{2}-\d{2})')[0], errors='coerce')
+    excluded = _year_end(status.str.extract(r'Исключение из ЕГРЮЛ.*?(\d{4})')[0])
+    return dates.fillna(iso).fillna(excluded)
+
+def compile_rule(rule: dict, now: datetime = None):
+    """
+    Compile one rule into a function frame -> boolean array of rows to drop. Rule types:
+    - status_regex: pattern (case-insensitive unless case=true), column (default 'Статус')
+    - liquidation_age: min_years since the liquidation date parsed from the status
+    - report_age: max_years since the last report year ('Дата последней отчетности')
+    - required_columns: columns; require='any' drops rows with all of them empty, 'all' rows with any empty
+    """
+    now = now or datetime.now()
+    kind = rule['type']
+    if kind == 'status_regex':
+        column = rule.get('column', 'Статус')
+        pattern = re.compile(rule['pattern'], 0 if rule.get('case') else re.IGNORECASE)
+        return lambda df: df[column].str.contains(pattern, na=False).to_numpy(dtype=bool)
+    if kind == 'liquidation_age':
+        # Fractional years as whole months (2.83 years ≈ 34 months)
+        threshold = now - pd.DateOffset(months=int(rule['min_years'] * 12))
+        column = rule.get('column', 'Статус')
+        return lambda df: (liquidation_dates(df[column]) < threshold).to_numpy(dtype=bool)
+    if kind == 'report_age':
+        threshold = now - pd.DateOffset(years=rule['max_years'])
+        column = rule.get('column', 'Дата последней отчетности')
+        # Missing report dates are always kept (NaT compares False)
+        return lambda df: (_year_end(df[column]) < threshold).to_numpy(dtype=bool)
+    if kind == 'required_columns':
+        columns = rule['columns']
+        if rule.get('require', 'all') == 'any':
+            return lambda df: ~df[columns].notna().any(axis=1).to_numpy(dtype=bool)
+        return lambda df: ~df[columns].notna().all(axis=1).to_numpy(dtype=bool)
+    raise ValueError(f"Unknown filter rule type: {kind}")
+
+def compile_rules(rules: list, now: datetime = None) -> list:
+    return [(rule['name'], compile_rule(rule, now)) for rule in rules]
+
+def apply_rules(df: pd.DataFrame, rules: list, now: datetime = None) -> tuple[pd.DataFrame, dict]:
+    """
+    Evaluate all rules into one combined drop mask and select the kept rows once.
+    Returns (kept rows, {rule name: rows it matched, 'dropped': rows dropped by any rule}).
+    """
+    drop = np.zeros(len(df), dtype=bool)
+    hits = {}
+    for name, matches in compile_rules(rules, now):
+        mask = matches(df)
+        hits[name] = int(mask.sum())
+        drop |= mask
+    hits['dropped'] = int(drop.sum())
+    return df[~drop], hits
 
 def filter_bankrupt(df: pd.DataFrame) -> pd.DataFrame:
     """Remove bankrupt companies (optional)"""
-    return df[~df['Статус'].str.contains('банкрот', case=False, na=False)]
+    return apply_rules(df, [{'name': 'bankrupt', 'type': 'status_regex', 'pattern': 'банкрот'}])[0]
 
 def filter_liquidated(df: pd.DataFrame, min_years: float = 2.83) -> pd.DataFrame:
-    """
-    Enhanced to handle:
-    - Russian date formats ("31 января 2025")
-    - Multiple status lines
-    - 'Исключение из ЕГРЮЛ' cases
-    - Uses integer years and months for reliable date math
-    """
-    def extract_liquidation_date(status):
-        if pd.isna(status):
-            return pd.NaT
-        
-        # Handle both date formats
-        date_patterns = [
-            r'ликвидировано (\d{1,2} \w+ \d{4})',  # Russian dates
-            r'ликвидировано (\d{4}-\d{2}-\d{2})',  # ISO dates
-            r'Исключение из ЕГРЮЛ.*?(\d{4})'       # Exclusion year
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, status)
-            if match:
-                date_str = match.group(1)
-                try:
-                    # Parse Russian dates
-                    if any(month in date_str for month in 
-                          ['января','февраля','марта','апреля','мая','июня',
-                           'июля','августа','сентября','октября','ноября','декабря']):
-                        return pd.to_datetime(date_str, format='%d %B %Y')
-                    # Parse year-only
-                    elif len(date_str) == 4:
-                        return pd.to_datetime(date_str + '-12-31')
-                    # Parse ISO dates
-                    else:
-                        return pd.to_datetime(date_str)
-                except:
-                    continue
-        return pd.NaT
-    
-    df['liquidation_date'] = df['Статус'].apply(extract_liquidation_date)
-    
-    # Convert fractional years to whole months (2.83 years ≈ 34 months)
-    months_threshold = int(min_years * 12)
-    threshold_date = datetime.now() - pd.DateOffset(months=months_threshold)
-    
-    # Only filter if liquidation date is older than threshold
-    liquid_mask = df['liquidation_date'].notna()
-    old_liquid_mask = df['liquidation_date'] < threshold_date
-    
-    return df[~(liquid_mask & old_liquid_mask)].drop(columns=['liquidation_date'])
+    """Remove companies liquidated more than min_years ago (see liquidation_dates for status formats)"""
+    return apply_rules(df, [{'name': 'liquidated', 'type': 'liquidation_age', 'min_years': min_years}])[0]
 
 def filter_old_reports(df: pd.DataFrame, max_years: int = 5) -> pd.DataFrame:
     """
-    Modified to:
-    - Always keep rows with NaN/empty reporting dates
-    - Only filter out rows with dates older than threshold
-    - Handle float-formatted years like 2022.0
+    Remove rows whose last report is older than max_years.
+    Rows with NaN/empty reporting dates are always kept; float years like 2022.0 are handled.
     """
-    # Convert float years to datetime (2022.0 → 2022-12-31)
-    df['report_date'] = pd.to_datetime(
-        df['Дата последней отчетности'].dropna().astype(int).astype(str) + '-12-31',
-        errors='coerce'
-    )
-    
-    threshold = datetime.now() - pd.DateOffset(years=max_years)
-    
-    # Keep rows where:
-    # 1. Report date is NaN (missing) OR
-    # 2. Report date is within threshold
-    keep_mask = df['report_date'].isna() | (df['report_date'] >= threshold)
-    return df[keep_mask].drop(columns=['report_date'])
+    return apply_rules(df, [{'name': 'old_reports', 'type': 'report_age', 'max_years': max_years}])[0]
+
 
+def load_companium_from_store(store_path: str) -> pd.DataFrame:
+    """Load companium data from the SQLite company store instead of a parsed CSV"""
+    from companium.store import open_store, read_companium_frame
+    conn = open_store(store_path)
+    try:
+        return read_companium_frame(conn)
+    finally:
+        conn.close()
+
+def inn_to_key(inn: pd.Series) -> pd.Series:
+    """Convert INNs to nullable integer join keys, parsed like the store (int key plus length)"""
+    keys, lengths, valid = series_keys(inn)
+    codes = InnArray(keys, lengths).codes()
+    return pd.Series(codes, index=inn.index, dtype='Int64').where(valid)
 
 def merge_and_enrich(main_df: pd.DataFrame, filtered_companium: pd.DataFrame) -> pd.DataFrame:
-    """Merge data and add debtor info columns"""
+    """Merge data and add debtor info columns (joined on integer INN keys)"""
     debtor_info = filtered_companium[['ИНН', 'Короткое название', 'Статус', 'Дата последней отчетности']]
     debtor_info.columns = ['debtor_inn', 'Название должника', 'Статус должника', 'Дата отчетности должника']
-    return pd.merge(main_df, debtor_info, on='debtor_inn', how='left')
+    debtor_info = debtor_info.assign(_inn_key=inn_to_key(debtor_info['debtor_inn'])).drop(columns=['debtor_inn'])
+    # pd.merge matches <NA> to <NA>: unparseable companium INNs would join every unparseable main row
+    debtor_info = debtor_info[debtor_info['_inn_key'].notna()]
+    merged = pd.merge(main_df.assign(_inn_key=inn_to_key(main_df['debtor_inn'])), debtor_info, on='_inn_key', how='left')
+    return merged.drop(columns=['_inn_key'])
 
 def propagate_debtor_info(df: pd.DataFrame) -> pd.DataFrame:
     """Fill debtor info for duplicate INNs (optional)"""
@@ -134,54 +185,109 @@ def clean_empty_debtors(df: pd.DataFrame, require_all: bool = False) -> pd.DataF
     require_all=False: remove if ANY debtor field is empty
     """
     debtor_cols = ['Название должника', 'Статус должника', 'Дата отчетности должника']
-    if require_all:
-        return df[df[debtor_cols].notna().any(axis=1)]
-    return df[df[debtor_cols].notna().all(axis=1)]
+    rule = {'name': 'empty_debtors', 'type': 'required_columns', 'columns': debtor_cols,
+            'require': 'any' if require_all else 'all'}
+    return apply_rules(df, [rule])[0]
+
 
+def completeness_score(df: pd.DataFrame, weights: dict = None) -> np.ndarray:
+    """
+    Weighted count of filled cells per row (NaN/None and '' count as empty).
+    weights maps column -> weight and limits the scan to those columns; default is every column with weight 1.
+    """
+    if weights is None:
+        weights = dict.fromkeys(df.columns, 1)
+    integral = all(float(w).is_integer() for w in weights.values())
+    score = np.zeros(len(df), dtype=np.int64 if integral else np.float64)
+    for col, weight in weights.items():
+        values = df[col].to_numpy()
+        filled = ~pd.isna(values)
+        if values.dtype == object:
+            # Only object columns can hold empty strings
+            filled &= values != ''
+        score += filled * (int(weight) if integral else weight)
+    return score
 
-def sort_by_empty_columns(df: pd.DataFrame) -> pd.DataFrame:
+def sort_by_empty_columns(df: pd.DataFrame, weights: dict = None, top_k: int = None) -> pd.DataFrame:
     """
     Sorts the DataFrame so that rows with more empty (NaN or empty string) columns are at the bottom.
+    Ties keep their input order. With top_k only the k most complete rows are returned (argpartition, no full sort).
     """
-    # Count NaN or empty string per row
-    empty_count = df.isna().sum(axis=1) + (df == '').sum(axis=1)
-    return df.assign(_empty_count=empty_count).sort_values('_empty_count').drop(columns=['_empty_count']).reset_index(drop=True)
+    score = completeness_score(df, weights)
+    if top_k is not None and top_k < len(df):
+        if top_k <= 0:
+            return df.iloc[:0].reset_index(drop=True)
+        # k-th best score via partition; ties at the cut are taken in input order, as a stable sort would
+        cut = np.partition(score, len(score) - top_k)[len(score) - top_k]
+        better = np.flatnonzero(score > cut)
+        idx = np.concatenate([better, np.flatnonzero(score == cut)[:top_k - len(better)]])
+        order = idx[np.lexsort((idx, -score[idx]))]
+    else:
+        if score.dtype == np.int64 and len(score) and -2 ** 15 < score.min() and score.max() < 2 ** 15:
+            # Small integer scores (negation included): numpy's stable sort is a radix sort here
+            score = score.astype(np.int16)
+        order = np.argsort(-score, kind='stable')
+    return df.iloc[order].reset_index(drop=True)
 
 def save_result(df: pd.DataFrame, output_path: str):
     """Save final dataframe"""
     df.to_csv(output_path, index=False)
 
+def print_rule_hits(stage: str, total: int, hits: dict):
+    print(f"{stage}: {total} rows, dropped {hits['dropped']}")
+    for name, count in hits.items():
+        if name != 'dropped':
+            print(f"  {name}: {count}")
+
+def run(companium_path: str, main_data_path: str, output_path: str, store_path: str = None,
+        completeness_weights: dict = None, top_k: int = None, rules_path: str = RULES_PATH):
+    """
+    Run the full filter pipeline (companium data from CSV or, if store_path is set, from the store).
+    Filters come from the rules file: 'companium' rules before the merge, 'result' rules after it.
+    completeness_weights/top_k are passed to sort_by_empty_columns.
+    """
+    rules = load_rules(rules_path or RULES_PATH)
+    # Load data
+    if store_path:
+        companium_df = load_companium_from_store(store_path)
+    else:
+        companium_df = load_companium_data(companium_path)
+    main_df = load_main_data(main_data_path)
+    print("Data loaded successfully")
+
+    # Process companium data
+    filtered, hits = apply_rules(companium_df, rules.get('companium', []))
+    print_rule_hits("Companium rules", len(companium_df), hits)
+
+    # Merge and process main data
+    result = merge_and_enrich(main_df, filtered)
+    result = propagate_debtor_info(result)
+    merged_rows = len(result)
+    result, hits = apply_rules(result, rules.get('result', []))
+    print_rule_hits("Result rules", merged_rows, hits)
+    result = sort_by_empty_columns(result, completeness_weights, top_k)
+
+    # Save result
+    save_result(result, output_path)
+    print(f"Processing complete. Output saved to {output_path}")
+    return result
+
 def main():
     # Configuration
     # COMPANIUM_PATH = "data/res250714_300_dropped_cols.csv"
     COMPANIUM_PATH = "data/res250714_300_dropped_cols.csv"
+    STORE_PATH = None  # e.g. "companium.db" to read companium data from the store
     MAIN_DATA_PATH = "data/cleaned___debt_creditors_add0.csv"
     OUTPUT_PATH = "data/res250714_400_filtered.csv"
+    COMPLETENESS_WEIGHTS = None  # e.g. {'Название должника': 3, 'Телефоны': 2, 'Электронные почты': 2}; None = all columns equal
+    TOP_K = None  # keep only the K most complete rows
+    RULES = RULES_PATH  # filter criteria (status regex, liquidation/report age, required columns)
     
     try:
-        # Load data
-        companium_df, main_df = load_data(COMPANIUM_PATH, MAIN_DATA_PATH)
-        print("Data loaded successfully")
-        
-        # Process companium data
-        filtered = companium_df.copy()
-        filtered = filter_bankrupt(filtered)
-        filtered = filter_liquidated(filtered)
-        filtered = filter_old_reports(filtered)
-        
-        # Merge and process main data
-        result = merge_and_enrich(main_df, filtered)
-        result = propagate_debtor_info(result)
-        result = clean_empty_debtors(result, require_all=True)
-        result = sort_by_empty_columns(result)
-        
-        # Save result
-        save_result(result, OUTPUT_PATH)
-        print(f"Processing complete. Output saved to {OUTPUT_PATH}")
-        
+        run(COMPANIUM_PATH, MAIN_DATA_PATH, OUTPUT_PATH, STORE_PATH, COMPLETENESS_WEIGHTS, TOP_K, RULES)
     except Exception as e:
         print(f"Error occurred: {str(e)}")
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
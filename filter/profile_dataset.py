@@ -0,0 +1,255 @@
+"""
+Single-pass profiler for pipeline CSV/Parquet files.
+
+Reads the file chunk by chunk and keeps only fixed-size state per column: null, empty and
+sentinel counts, a HyperLogLog cardinality sketch, INN length and checksum stats, and
+min/max of date columns. Rows with problems in the checked columns can be streamed to a
+separate CSV. Memory does not grow with the file size.
+"""
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 200_000
+SENTINELS = frozenset({'None', 'none', 'nan', 'NaN', 'NULL', 'null', 'NaT', 'N/A', 'n/a', '-'})
+INN_COLUMN = re.compile(r'(?i)(^|_)inn$|^инн')
+DATE_COLUMN = re.compile(r'(?i)date|дата')
+HLL_PRECISION = 14  # 2^14 registers, ~0.8% standard error
+EXAMPLES = 5  # offending values kept per column for the report
+
+INN10_WEIGHTS = np.array([2, 4, 10, 3, 5, 9, 4, 6, 8])
+INN11_WEIGHTS = np.array([7, 2, 4, 10, 3, 5, 9, 4, 6, 8])
+INN12_WEIGHTS = np.array([3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8])
+YEAR = re.compile(r'^[0-9]{4}(\.0+)?$')
+
+class HyperLogLog:
+    """Cardinality sketch over 64-bit hashes (pandas hash_pandas_object)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values: pd.Series):
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64-p bits; rest < 2^53 converts to float exactly
+        top = np.floor(np.log2(np.maximum(rest, 1).astype(np.float64))).astype(np.int64)
+        rank = np.where(rest == 0, 64 - self.p + 1, 64 - self.p - top).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
+
+def inn_checksum_ok(digits: pd.Series) -> np.ndarray:
+    """FNS check digits for canonical 10/12-digit INN strings (other lengths are False)."""
+    ok = np.zeros(len(digits), dtype=bool)
+    lengths = digits.str.len().to_numpy()
+    for length in (10, 12):
+        mask = lengths == length
+        if not mask.any():
+            continue
+        raw = ''.join(digits[mask].tolist()).encode('ascii')
+        d = (np.frombuffer(raw, dtype=np.uint8).reshape(-1, length) - 48).astype(np.int64)
+        if length == 10:
+            good = (d[:, :9] @ INN10_WEIGHTS) % 11 % 10 == d[:, 9]
+        else:
+            good = (((d[:, :10] @ INN11_WEIGHTS) % 11 % 10 == d[:, 10])
+                    & ((d[:, :11] @ INN12_WEIGHTS) % 11 % 10 == d[:, 11]))
+        ok[mask] = good
+    return ok
+
+class ColumnProfile:
+    def __init__(self, name: str, kind: str):
+        self.name = name
+        self.kind = kind  # 'inn' | 'date' | 'text'
+        self.rows = 0
+        self.nulls = 0
+        self.empty = 0
+        self.sentinels = Counter()
+        self.hll = HyperLogLog()
+        self.lengths = Counter()  # inn: raw digit lengths
+        self.checksum_ok = 0
+        self.checksum_bad = 0
+        self.malformed = 0  # inn: not 9-12 digits; date: unparseable
+        self.date_min = None
+        self.date_max = None
+        self.years_only = True
+        self.examples: List[str] = []
+
+    def _example(self, values: pd.Series):
+        if len(self.examples) < EXAMPLES:
+            self.examples += values.head(EXAMPLES - len(self.examples)).tolist()
+
+    def update(self, column: pd.Series) -> pd.Series:
+        """Consume one chunk; returns a per-row problem reason ('' when the value is fine)."""
+        self.rows += len(column)
+        null = column.isna().to_numpy()
+        text = column.astype(str).str.strip().where(~null, '')
+        empty = (text == '').to_numpy() & ~null
+        sentinel = text.isin(SENTINELS).to_numpy()
+        self.nulls += int(null.sum())
+        self.empty += int(empty.sum())
+        if sentinel.any():
+            self.sentinels.update(text[sentinel].tolist())
+        present = ~(null | empty | sentinel)
+        values = text[present]
+        self.hll.add(values)
+        reason = np.where(null | empty | sentinel, 'missing', '').astype(object)
+        if self.kind == 'inn':
+            reason[present] = self._check_inn(values)
+        elif self.kind == 'date':
+            reason[present] = self._check_dates(values)
+        return pd.Series(reason, index=column.index)
+
+    def _check_inn(self, values: pd.Series) -> np.ndarray:
+        digits = values.str.replace(r'\.0$', '', regex=True)
+        # [0-9], not \d: other Unicode digits are malformed, not input for the ASCII checksum
+        well_formed = digits.str.fullmatch(r'[0-9]{9,12}').to_numpy(dtype=bool)
+        self.lengths.update(digits.str.len().tolist())
+        self.malformed += int((~well_formed).sum())
+        # 9/11 digits are 10/12-digit INN that lost a leading zero
+        canonical = digits.where(~digits.str.len().isin([9, 11]), '0' + digits)
+        ok = inn_checksum_ok(canonical.where(well_formed, ''))
+        self.checksum_ok += int((ok & well_formed).sum())
+        self.checksum_bad += int((~ok & well_formed).sum())
+        reason = np.where(~well_formed, 'malformed', np.where(ok, '', 'checksum')).astype(object)
+        self._example(values[reason != ''])
+        return reason
+
+    def _check_dates(self, values: pd.Series) -> np.ndarray:
+        years = values.str.fullmatch(YEAR.pattern).to_numpy(dtype=bool)
+        parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        if years.any():
+            parsed[years] = pd.to_datetime(values[years].str[:4], format='%Y', errors='coerce')
+        if (~years).any():
+            self.years_only = False
+            # ISO first (vectorized, and dayfirst would swap its month and day), then dd.mm.yyyy and the rest
+            parsed[~years] = pd.to_datetime(values[~years], errors='coerce', format='ISO8601')
+            rest = ~years & parsed.isna().to_numpy()
+            if rest.any():
+                parsed[rest] = pd.to_datetime(values[rest], errors='coerce', dayfirst=True, format='mixed')
+        bad = parsed.isna().to_numpy()
+        self.malformed += int(bad.sum())
+        self._example(values[bad])
+        if (~bad).any():
+            low, high = parsed.min(), parsed.max()
+            self.date_min = low if self.date_min is None else min(self.date_min, low)
+            self.date_max = high if self.date_max is None else max(self.date_max, high)
+        return np.where(bad, 'unparseable', '').astype(object)
+
+    def report(self) -> dict:
+        out = {'kind': self.kind, 'rows': self.rows, 'nulls': self.nulls, 'empty': self.empty,
+               'sentinels': dict(self.sentinels), 'distinct_estimate': self.hll.estimate()}
+        if self.kind == 'inn':
+            out.update(lengths={str(k): v for k, v in sorted(self.lengths.items())},
+                       checksum_ok=self.checksum_ok, checksum_bad=self.checksum_bad, malformed=self.malformed)
+        elif self.kind == 'date':
+            fmt = '%Y' if self.years_only else '%Y-%m-%d'
+            out.update(unparseable=self.malformed,
+                       min=self.date_min.strftime(fmt) if self.date_min is not None else None,
+                       max=self.date_max.strftime(fmt) if self.date_max is not None else None)
+        if self.examples:
+            out['examples'] = self.examples
+        return out
+
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """CSV as strings (empty fields stay '', 'None'/'nan' stay literal) or Parquet record batches."""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+def column_kind(name: str, inn_columns: Optional[List[str]], date_columns: Optional[List[str]]) -> str:
+    if inn_columns is not None:
+        if name in inn_columns:
+            return 'inn'
+    elif INN_COLUMN.search(name):
+        return 'inn'
+    if date_columns is not None:
+        return 'date' if name in date_columns else 'text'
+    return 'date' if DATE_COLUMN.search(name) else 'text'
+
+def profile_dataset(path: str, inn_columns: Optional[List[str]] = None, date_columns: Optional[List[str]] = None,
+                    columns: Optional[List[str]] = None, check: Optional[List[str]] = None,
+                    bad_rows_path: Optional[str] = None, chunk_rows: int = CHUNK_ROWS) -> Dict[str, ColumnProfile]:
+    """
+    Profile every column (or only `columns`) in one pass. INN/date columns are detected by name
+    unless given explicitly. Rows with a problem in any `check` column (default: all INN and date
+    columns) are appended to bad_rows_path with a '_problems' column.
+    """
+    profiles: Dict[str, ColumnProfile] = {}
+    if bad_rows_path and os.path.exists(bad_rows_path):
+        os.remove(bad_rows_path)
+    wrote_header = False
+    for chunk in read_chunks(path, chunk_rows):
+        if not profiles:
+            unknown = [c for c in dict.fromkeys((columns or []) + (check or [])) if c not in chunk.columns]
+            if unknown:
+                raise ValueError(f"{path}: no such columns: {', '.join(unknown)} "
+                                 f"(available: {', '.join(chunk.columns)})")
+            for name in columns or chunk.columns:
+                profiles[name] = ColumnProfile(name, column_kind(name, inn_columns, date_columns))
+        problems = pd.Series('', index=chunk.index, dtype=object)
+        for name, profile in profiles.items():
+            reason = profile.update(chunk[name])
+            checked = name in check if check is not None else profile.kind != 'text'
+            if checked:
+                flagged = reason != ''
+                problems[flagged] = problems[flagged] + f"{name}:" + reason[flagged] + ';'
+        if bad_rows_path:
+            bad = chunk[problems != ''].assign(_problems=problems[problems != ''].str.rstrip(';'))
+            if len(bad):
+                bad.to_csv(bad_rows_path, mode='a' if wrote_header else 'w', header=not wrote_header, index=False)
+                wrote_header = True
+    return profiles
+
+def format_report(profiles: Dict[str, ColumnProfile]) -> str:
+    lines = []
+    for name, profile in profiles.items():
+        r = profile.report()
+        line = (f"{name} [{r['kind']}]: rows {r['rows']}, nulls {r['nulls']}, empty {r['empty']}, "
+                f"sentinels {sum(r['sentinels'].values())}, ~distinct {r['distinct_estimate']}")
+        if r['sentinels']:
+            line += f" {r['sentinels']}"
+        if r['kind'] == 'inn':
+            line += (f"\n    lengths {r['lengths']}, checksum ok {r['checksum_ok']}, bad {r['checksum_bad']}, "
+                     f"malformed {r['malformed']}")
+        elif r['kind'] == 'date':
+            line += f"\n    min {r['min']}, max {r['max']}, unparseable {r['unparseable']}"
+        if r.get('examples'):
+            line += f"\n    examples: {r['examples']}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+def run(path: str, report_path: Optional[str] = None, bad_rows_path: Optional[str] = None, **kwargs):
+    profiles = profile_dataset(path, bad_rows_path=bad_rows_path, **kwargs)
+    print(format_report(profiles))
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({name: p.report() for name, p in profiles.items()}, f, ensure_ascii=False, indent=2)
+        print(f"Report saved to {report_path}")
+    if bad_rows_path and os.path.exists(bad_rows_path):
+        print(f"Offending rows saved to {bad_rows_path}")
+    return profiles
+
+if __name__ == '__main__':
+    run("data/res250714_300_dropped_cols.csv")
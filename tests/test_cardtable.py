@@ -0,0 +1,30 @@
+from companium.cardtable import CardTable
+
+
+def make_card():
+    return {
+        'ИНН': '7707083893',
+        'Статус': 'Действующая',
+        'Генеральный директор': {'Имя': 'Иванов И. И.', 'Ссылка': '/people/1'},
+        'Телефоны': ['+7 495 000-00-00'],
+        'Виды деятельности': [{'code': '64.19', 'text': 'Денежное посредничество', 'tags': ['основной']}],
+    }
+
+
+def test_mutating_returned_card_keeps_cache():
+    table = CardTable({'7707083893': make_card()})
+    card = table['7707083893']
+    card['Генеральный директор']['Имя'] = 'Петров П. П.'
+    card['Телефоны'].append('+7 495 111-11-11')
+    card['Виды деятельности'][0]['tags'].append('изменён')
+    card['Виды деятельности'][0]['code'] = '00.00'
+    assert table['7707083893'] == make_card()
+    assert table.copy()['7707083893'] == make_card()
+
+
+def test_mutating_stored_card_keeps_cache():
+    card = make_card()
+    table = CardTable({'7707083893': card})
+    card['Телефоны'].clear()
+    card['Виды деятельности'][0]['tags'].clear()
+    assert table['7707083893'] == make_card()
@@ -0,0 +1,60 @@
+"""
+Разбор карточек по синтетическим страницам bench/fixtures: проверка результата
+и, если установлен pytest-benchmark, замер скорости.
+
+    python -m pytest tests/test_parser_bench.py --benchmark-only
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+from companium import page  # noqa: E402
+from fixtures import KINDS, STATUSES, company_page  # noqa: E402
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    pytest_benchmark = None
+
+needs_benchmark = pytest.mark.skipif(pytest_benchmark is None, reason="pytest-benchmark не установлен")
+
+INN = '7707083893'
+CORPUS = [company_page(str(7700000000 + i), padding=400, kind=KINDS[i % len(KINDS)]) for i in range(20)]
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_parse_matches_fixture(kind):
+    card = page.parse_company_page(company_page(INN, padding=5, kind=kind))
+    assert card['ИНН'] == INN
+    assert card['Короткое название'] == f'ООО "КОМПАНИЯ {INN}"'
+    assert card['Адрес'].startswith('г. Москва, ул. Примерная')
+    assert card['Телефоны'] == ['+7 495 000-00-00']
+    assert card['Электронные почты'] == ['info@example.ru']
+    assert len(card['Виды деятельности']) == 3
+    assert card['Контракты по госзакупкам'] == {'Наличие контрактов по госзакупкам': False}
+    if kind == 'active':
+        assert card['Статус'] == STATUSES[0][1]
+    elif kind == 'liquidated':
+        assert card['Статус'] == STATUSES[1][1]
+    elif kind == 'individual':
+        assert card['Статус'] == STATUSES[2][1]
+        assert 'Генеральный директор' not in card
+        assert card['Учредители'] == {'Информация': 'Нет сведений'}
+    if kind in ('individual', 'no_financials'):
+        assert 'Финансовая отчетность' not in card
+        assert card['Дата последней отчетности'] is None
+    else:
+        assert card['Финансовая отчетность']['Период'] == 'Финансовая отчетность за 2023 год'
+    if kind == 'managed':
+        assert card['Управляющая компания']['link'] == f'/id/{INN[::-1]}'
+    elif kind != 'individual':
+        assert card['Генеральный директор']['ИНН'] == f'{INN}00'
+
+
+@needs_benchmark
+def test_bench_parse_corpus(benchmark):
+    cards = benchmark(lambda: [page.parse_company_page(html) for html in CORPUS])
+    assert [card['ИНН'] for card in cards] == [str(7700000000 + i) for i in range(len(CORPUS))]